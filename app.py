@@ -0,0 +1,43 @@
+#prediction api, latest pushed model is loaded once when the app starts
+#POST /predict with one record (json object) or many records (json list), GET /stats for throughput and queue depth
+from flask import Flask, request, jsonify
+from visa.config.configuration import Configuartion
+from visa.pipeline.prediction_service import PredictionService
+from visa.exception import CustomException
+from visa.logger import logging
+import sys
+
+
+app = Flask(__name__)
+prediction_service = PredictionService(prediction_service_config=Configuartion().get_prediction_service_config())
+
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    try:
+        payload = request.get_json(force=True)
+        is_single_record = isinstance(payload, dict)
+        records = [payload] if is_single_record else payload
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            return jsonify({"error": "request body must be a json object or a list of json objects"}), 400
+        if len(records) == 0:
+            return jsonify([])
+        error_message = prediction_service.validate_records(records)
+        if error_message is not None:
+            return jsonify({"error": error_message}), 400
+
+        results = prediction_service.predict(records)
+        return jsonify(results[0] if is_single_record else results)
+    except Exception as e:
+        visa = CustomException(e, sys)
+        logging.info(visa.error_message)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify(prediction_service.get_stats())
+
+
+if __name__ == "__main__":
+    app.run(threaded=True)
@@ -0,0 +1,22 @@
+#scoring a csv file with the latest pushed model
+#usage: python batch_predict.py <input csv file path> <output csv file path>
+import sys
+from visa.config.configuration import Configuartion
+from visa.pipeline.batch_prediction import BatchPrediction
+from visa.logger import logging
+
+
+def main(input_file_path: str, output_file_path: str):
+    try:
+        batch_prediction = BatchPrediction(batch_prediction_config=Configuartion().get_batch_prediction_config())
+        batch_prediction.initiate_batch_prediction(input_file_path=input_file_path, output_file_path=output_file_path)
+    except Exception as e:
+        logging.error(f"{e}")
+        print(e)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python batch_predict.py <input csv file path> <output csv file path>")
+        sys.exit(1)
+    main(input_file_path=sys.argv[1], output_file_path=sys.argv[2])
@@ -0,0 +1,160 @@
+#benchmark of the class rebalancing strategies of data transformation
+#every strategy is timed and the model trained on the rebalanced data is scored with f1 on untouched test data
+#usage: python benchmark.py [csv file path]
+#
+#benchmark of single record prediction, predict on a one row dataframe against predict_one on a dict
+#usage: python benchmark.py prediction [csv file path] [model file path]
+#
+#benchmark of halving search with time budget, number of trees fitted with the budget against the search without it
+#usage: python benchmark.py halving [csv file path] [time budget seconds]
+import sys
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from visa.config.configuration import Configuartion
+from visa.components.data_ingestion import DataIngestion
+from visa.components.data_transformation import DataTransformation
+from visa.entity.artifact_entity import DataValidationArtifact
+from visa.utils.utils import read_yaml_file, load_object, get_latest_model_path
+from visa.pipeline.batch_prediction import get_prediction_features
+from visa.entity.model_factory import ModelFactory, HALVING_GRID_SEARCH_STRATEGY
+from visa.constant import *
+
+
+#transformed train and test arrays of the csv file, same derived columns and same test share as data ingestion
+def get_benchmark_arrays(file_path: str) -> tuple:
+    config = Configuartion()
+    data_transformation_config = config.get_data_transformation_config()
+    schema_file_path = config.get_data_validation_config().schema_file_path
+    target_column_name = read_yaml_file(file_path=schema_file_path)[TARGET_COLUMN_KEY]
+
+    dataframe = DataIngestion.add_derived_columns(dataframe=pd.read_csv(file_path), current_year=date.today().year)
+    train_df, test_df = train_test_split(dataframe, test_size=0.2, random_state=42,
+                                         stratify=dataframe[target_column_name])
+
+    data_transformation = DataTransformation(
+        data_transformation_config=data_transformation_config,
+        data_ingestion_artifact=None,
+        data_validation_artifact=DataValidationArtifact(schema_file_path=schema_file_path, is_validated=True,
+                                                        message="benchmark", report_file_path=None))
+    preprocessing_obj = data_transformation.get_data_transformer_object()
+    input_feature_train_arr = preprocessing_obj.fit_transform(train_df.drop(columns=[target_column_name]))
+    input_feature_test_arr = preprocessing_obj.transform(test_df.drop(columns=[target_column_name]))
+    target_feature_train = train_df[target_column_name].to_numpy()
+    target_feature_test = test_df[target_column_name].to_numpy()
+    return input_feature_train_arr, target_feature_train, input_feature_test_arr, target_feature_test
+
+
+def benchmark_rebalancing(file_path: str) -> pd.DataFrame:
+    data_transformation_config = Configuartion().get_data_transformation_config()
+    input_feature_train_arr, target_feature_train, input_feature_test_arr, target_feature_test = \
+        get_benchmark_arrays(file_path=file_path)
+
+    results = []
+    for strategy in REBALANCING_STRATEGIES:
+        resampler = DataTransformation.get_resampler_object(
+            strategy=strategy,
+            sampling_strategy=data_transformation_config.rebalancing_sampling_strategy,
+            random_state=data_transformation_config.rebalancing_random_state)
+
+        start_time = time.perf_counter()
+        if resampler is not None:
+            x_train, y_train = resampler.fit_resample(input_feature_train_arr, target_feature_train)
+        else:
+            x_train, y_train = input_feature_train_arr, target_feature_train
+        resample_seconds = time.perf_counter() - start_time
+
+        class_weight = BALANCED_CLASS_WEIGHT if strategy == REBALANCING_STRATEGY_CLASS_WEIGHT else None
+        model = RandomForestClassifier(n_estimators=100, max_depth=10, class_weight=class_weight,
+                                       random_state=42, n_jobs=-1)
+        start_time = time.perf_counter()
+        model.fit(x_train, y_train)
+        fit_seconds = time.perf_counter() - start_time
+
+        results.append({"strategy": strategy,
+                        "train_rows": len(y_train),
+                        "resample_seconds": round(resample_seconds, 3),
+                        "fit_seconds": round(fit_seconds, 3),
+                        "test_f1": round(f1_score(target_feature_test, model.predict(input_feature_test_arr)), 4)})
+    return pd.DataFrame(results)
+
+
+def benchmark_single_record_prediction(file_path: str, model_file_path: str = None,
+                                       number_of_records: int = 1000) -> pd.DataFrame:
+    if model_file_path is None:
+        batch_prediction_config = Configuartion().get_batch_prediction_config()
+        model_file_path = get_latest_model_path(model_export_dir=batch_prediction_config.model_export_dir,
+                                                model_file_name=batch_prediction_config.model_file_name)
+    model = load_object(file_path=model_file_path)
+    dataframe = get_prediction_features(dataframe=pd.read_csv(file_path, nrows=number_of_records),
+                                        current_year=date.today().year)
+    dataframe = dataframe[list(model.preprocessing_object.feature_names_in_)]
+    records = dataframe.to_dict("records")
+
+    #same input as a caller with one application: one dataframe is built per record for predict
+    #transform rows show the preprocessing part of the latency without the model call
+    methods = {
+        "predict_dataframe": (lambda record: model.predict(pd.DataFrame([record]))[0], "predict_dataframe"),
+        "predict_one": (lambda record: model.predict_one(record), "predict_dataframe"),
+        "transform_dataframe": (lambda record: model.transform(pd.DataFrame([record])), "transform_dataframe"),
+        "transform_records": (lambda record: model.transform_records([record]), "transform_dataframe"),
+    }
+    results = []
+    outputs = dict()
+    for method_name, (method, reference_method_name) in methods.items():
+        start_time = time.perf_counter()
+        outputs[method_name] = [method(record) for record in records]
+        seconds = time.perf_counter() - start_time
+        results.append({"method": method_name,
+                        "records": len(records),
+                        "mean_latency_ms": round(1000 * seconds / len(records), 4),
+                        "same_output": all(np.array_equal(output, reference_output) for output, reference_output
+                                           in zip(outputs[method_name], outputs[reference_method_name]))})
+    return pd.DataFrame(results)
+
+
+def benchmark_halving_time_budget(file_path: str, time_budget: float = 0) -> pd.DataFrame:
+    #first model of model.yaml searched with halving grid strategy once without and once with the budget
+    model_factory = ModelFactory(model_config_path=Configuartion().get_model_trainer_config().model_config_file_path)
+    model_factory.search_strategy = HALVING_GRID_SEARCH_STRATEGY
+    initialized_model = model_factory.get_initialized_model_list()[0]
+    candidate_params = model_factory.get_candidate_params(initialized_model=initialized_model)
+    input_feature_train_arr, target_feature_train, _, _ = get_benchmark_arrays(file_path=file_path)
+
+    results = []
+    for budget in [None, time_budget]:
+        search_cv = model_factory.get_search_object(initialized_model=initialized_model._replace(time_budget=budget),
+                                                    candidate_params=candidate_params)
+        start_time = time.perf_counter()
+        search_cv.fit(input_feature_train_arr, target_feature_train)
+        seconds = time.perf_counter() - start_time
+
+        #every candidate of every iteration is fitted once per fold with n_resources trees
+        trees = int(np.sum(search_cv.cv_results_["n_resources"])) * search_cv.n_splits_
+        results.append({"time_budget": budget,
+                        "iterations": search_cv.n_iterations_,
+                        "candidates": len(candidate_params),
+                        "trees": trees,
+                        "seconds": round(seconds, 3),
+                        "best_score": round(search_cv.best_score_, 4),
+                        "same_or_fewer_trees": trees <= results[0]["trees"] if results else True})
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "halving":
+        file_path = sys.argv[2] if len(sys.argv) > 2 else "Visadataset.csv"
+        time_budget = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+        print(benchmark_halving_time_budget(file_path=file_path, time_budget=time_budget).to_string(index=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "prediction":
+        file_path = sys.argv[2] if len(sys.argv) > 2 else "Visadataset.csv"
+        model_file_path = sys.argv[3] if len(sys.argv) > 3 else None
+        print(benchmark_single_record_prediction(file_path=file_path,
+                                                 model_file_path=model_file_path).to_string(index=False))
+    else:
+        file_path = sys.argv[1] if len(sys.argv) > 1 else "Visadataset.csv"
+        print(benchmark_rebalancing(file_path=file_path).to_string(index=False))
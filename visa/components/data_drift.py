@@ -0,0 +1,121 @@
+#checking if new ingested data is similar to the data on which current best model was trained
+#training data of every model is kept as a small sketch (histograms and category frequencies) next to that model
+#so new data is compared against the sketch and raw training data of old run is not needed
+import os
+import sys
+from visa.constant import *
+from visa.logger import logging
+from visa.exception import CustomException
+from visa.entity.config_entity import DataDriftConfig
+from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataDriftArtifact
+from visa.entity.drift_statistics import build_reference_sketch, compute_drift_statistics
+from visa.utils.utils import read_yaml_file, write_yaml_file, load_data
+
+
+class DataDrift:
+
+    def __init__(self, data_drift_config: DataDriftConfig,
+                 data_ingestion_artifact: DataIngestionArtifact,
+                 data_validation_artifact: DataValidationArtifact):
+        try:
+            logging.info(f"{'>>' * 30}Data Drift log started.{'<<' * 30} ")
+            self.data_drift_config = data_drift_config
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_validation_artifact = data_validation_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#reference sketch saved next to the best model written in evaluation file, None for first run
+    def get_reference_sketch_file_path(self) -> str:
+        try:
+            model_evaluation_file_path = self.data_drift_config.model_evaluation_file_path
+            if not os.path.exists(model_evaluation_file_path):
+                return None
+
+            model_eval_file_content = read_yaml_file(file_path=model_evaluation_file_path)
+            model_eval_file_content = dict() if model_eval_file_content is None else model_eval_file_content
+            if BEST_MODEL_KEY not in model_eval_file_content:
+                return None
+
+            best_model_path = model_eval_file_content[BEST_MODEL_KEY][MODEL_PATH_KEY]
+            reference_sketch_file_path = os.path.join(os.path.dirname(best_model_path),
+                                                      self.data_drift_config.reference_sketch_file_name)
+            if not os.path.exists(reference_sketch_file_path):
+                logging.info(f"Best model [{best_model_path}] does not have reference sketch")
+                return None
+            return reference_sketch_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#column is drifted if psi or ks is more than its threshold
+    def get_drifted_columns(self, drift_statistics: dict) -> list:
+        try:
+            drifted_columns = []
+            for column, statistics in drift_statistics.items():
+                is_psi_drifted = statistics[DRIFT_REPORT_PSI_KEY] > self.data_drift_config.psi_threshold
+                is_ks_drifted = statistics[DRIFT_REPORT_KS_KEY] is not None and \
+                                statistics[DRIFT_REPORT_KS_KEY] > self.data_drift_config.ks_threshold
+                if is_psi_drifted or is_ks_drifted:
+                    drifted_columns.append(column)
+            return drifted_columns
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_data_drift(self) -> DataDriftArtifact:
+        try:
+            schema_file_path = self.data_validation_artifact.schema_file_path
+            schema_columns = list(read_yaml_file(file_path=schema_file_path)[DATASET_SCHEMA_COLUMNS_KEY].keys())
+
+            train_dataframe = load_data(file_path=self.data_ingestion_artifact.train_file_path,
+                                        schema_file_path=schema_file_path)
+            test_dataframe = load_data(file_path=self.data_ingestion_artifact.test_file_path,
+                                       schema_file_path=schema_file_path)
+
+            #sketch of new training data, it becomes the reference if the trained model is accepted
+            reference_sketch_file_path = self.data_drift_config.reference_sketch_file_path
+            new_sketch = build_reference_sketch(dataframe=train_dataframe, columns=schema_columns,
+                                                num_bins=self.data_drift_config.num_bins)
+            write_yaml_file(file_path=reference_sketch_file_path, data=new_sketch)
+            logging.info(f"Reference sketch of training data saved at: [{reference_sketch_file_path}]")
+
+            previous_sketch_file_path = self.get_reference_sketch_file_path()
+            if previous_sketch_file_path is None:
+                message = "Reference sketch of best model not found, drift check skipped"
+                logging.info(message)
+                return DataDriftArtifact(is_drift_detected=False, drift_report_file_path=None,
+                                         reference_sketch_file_path=reference_sketch_file_path, message=message)
+
+            logging.info(f"Comparing train and test data with reference sketch: [{previous_sketch_file_path}]")
+            drift_statistics = compute_drift_statistics(dataframes=[train_dataframe, test_dataframe],
+                                                        reference_sketch=read_yaml_file(previous_sketch_file_path))
+            drifted_columns = self.get_drifted_columns(drift_statistics=drift_statistics)
+            is_drift_detected = len(drifted_columns) > 0
+
+            drift_report_file_path = self.data_drift_config.drift_report_file_path
+            write_yaml_file(file_path=drift_report_file_path, data={
+                DRIFT_REPORT_REFERENCE_SKETCH_KEY: previous_sketch_file_path,
+                DRIFT_REPORT_IS_DRIFT_DETECTED_KEY: is_drift_detected,
+                DRIFT_REPORT_DRIFTED_COLUMNS_KEY: drifted_columns,
+                DRIFT_REPORT_STATISTICS_KEY: drift_statistics,
+            })
+            logging.info(f"Drift report saved at: [{drift_report_file_path}]")
+
+            if is_drift_detected:
+                message = f"Data drift detected in columns: {drifted_columns}"
+                logging.info(message)
+                if self.data_drift_config.fail_on_drift:
+                    raise ValueError(message)
+            else:
+                message = "Data drift not detected"
+
+            data_drift_artifact = DataDriftArtifact(is_drift_detected=is_drift_detected,
+                                                    drift_report_file_path=drift_report_file_path,
+                                                    reference_sketch_file_path=reference_sketch_file_path,
+                                                    message=message)
+            logging.info(f"Data drift artifact: {data_drift_artifact}")
+            return data_drift_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Data Drift log completed.{'<<' * 30} ")
@@ -1,6 +1,8 @@
 #first we will define each and everything here
 import os
 import sys
+import glob
+import shutil
 from six.moves import urllib
 import numpy as np
 import pandas as pd
@@ -10,8 +12,9 @@ from visa.entity.config_entity import DataIngestionConfig
 from visa.entity.artifact_entity import DataIngestionArtifact
 from visa.config.configuration import Configuartion
 from visa.exception import CustomException
-from visa.utils.utils import read_yaml_file
+from visa.utils.utils import read_yaml_file, read_csv_with_schema, save_columnar_data, get_file_hash, get_cache_key, link_or_copy_file, write_yaml_file
 from sklearn.model_selection import train_test_split
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
             
 
@@ -45,6 +48,25 @@ class DataIngestion:
             #path of raw data file, merging the dir and file
             raw_file_path = os.path.join(raw_data_dir, us_visa_file_name)
 
+            #local path and file:// url are linked into raw data dir, nothing is downloaded
+            source_file_path = self.get_local_source_path(download_url)
+
+            #local dir means upstream gave us many shards, linking every shard matching the pattern
+            if source_file_path is not None and os.path.isdir(source_file_path):
+                shard_file_paths = sorted(glob.glob(os.path.join(source_file_path,
+                                                                 self.data_ingestion_config.raw_data_file_pattern)))
+                logging.info(f"Linking [{len(shard_file_paths)}] shards from :[{source_file_path}] into :[{raw_data_dir}]")
+                for shard_file_path in shard_file_paths:
+                    link_or_copy_file(src=shard_file_path,
+                                      dst=os.path.join(raw_data_dir, os.path.basename(shard_file_path)))
+                return raw_data_dir
+
+            if source_file_path is not None:
+                logging.info(
+                    f"Linking local file :[{source_file_path}] into :[{raw_file_path}]")
+                link_or_copy_file(src=source_file_path, dst=raw_file_path)
+                return raw_file_path
+
             logging.info(
                 f"Downloading file from :[{download_url}] into :[{raw_file_path}]")
             urllib.request.urlretrieve(download_url, raw_file_path)
@@ -55,19 +77,30 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+#returns path of the file if download url is a local path or file:// url else None
+    @staticmethod
+    def get_local_source_path(download_url: str):
+        try:
+            if os.path.exists(download_url):
+                return download_url
+            parsed_url = urllib.parse.urlparse(download_url)
+            if parsed_url.scheme == "file":
+                return urllib.request.url2pathname(parsed_url.path)
+            return None
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
 #function to split the data and to return in dataingestionartifact format
     def split_data_as_train_test(self) -> DataIngestionArtifact:
         try:
             #getting raw data
             raw_data_dir = self.data_ingestion_config.raw_data_dir
             
-            #getting first file from raw dir after listing all the directory
-            file_name = os.listdir(raw_data_dir)[0]
-            
-            #path of the raw data file
-            us_visa_file_path = os.path.join(raw_data_dir, file_name)
+            #getting all the shards from raw dir matching the pattern
+            raw_file_paths = self.get_raw_file_paths()
+            file_name = self.get_ingested_file_name(raw_file_paths=raw_file_paths)
 
-            logging.info(f"Reading csv file: [{us_visa_file_path}]")
+            logging.info(f"Reading csv files: {raw_file_paths}")
 
             # creating the date object of today's date
             #whenever we get the file under raw data dir , it will store like below format, in date year format
@@ -75,45 +108,46 @@ class DataIngestion:
             todays_date = date.today()
             current_year= todays_date.year
             
-            #reading the raw data csv file
-            us_visa_dataframe = pd.read_csv(us_visa_file_path)
-            
-            #making a new column
-            us_visa_dataframe[COLUMN_COMPANY_AGE] = current_year-us_visa_dataframe[COLUMN_YEAR_ESTB]
-            
-            #drop some columns
-            us_visa_dataframe.drop([COLUMN_ID,COLUMN_YEAR_ESTB], axis=1, inplace=True)
-            us_visa_dataframe[COLUMN_CASE_STATUS] = np.where(us_visa_dataframe[COLUMN_CASE_STATUS] == 'Denied', 1,0)
-
-
-            #splitting the data          
-            logging.info(f"Splitting data into train and test")
-
-            train_set = None
-            test_set = None
-
-            train_set, test_set = train_test_split(us_visa_dataframe, test_size=0.2, random_state=42)
-            
             #train file path
             train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
                                            file_name)
             #test file path
             test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir,
                                           file_name)
+
+            #big files are read and split chunk by chunk so memory depends on chunk size only
+            if self.data_ingestion_config.chunk_size:
+                self.split_shards_in_chunks(raw_file_paths=raw_file_paths,
+                                            train_file_path=train_file_path,
+                                            test_file_path=test_file_path,
+                                            current_year=current_year)
+            else:
+                us_visa_dataframe = self.read_raw_data(raw_file_paths=raw_file_paths, current_year=current_year)
+
+                #splitting the data          
+                logging.info(f"Splitting data into train and test")
+
+                train_set = None
+                test_set = None
+
+                train_set, test_set = train_test_split(us_visa_dataframe,
+                                                       test_size=self.data_ingestion_config.test_size,
+                                                       random_state=self.data_ingestion_config.random_state,
+                                                       stratify=us_visa_dataframe[COLUMN_CASE_STATUS])
 # ***********************************************************************************************
-           #if train and test is not none then create a dir just to store the data under train and test file
-           #in csv
-            if train_set is not None:
-                #creating train dir if not created to export the train csv data in it
-                os.makedirs(self.data_ingestion_config.ingested_train_dir, exist_ok=True)
-                logging.info(f"Exporting training dataset to file: [{train_file_path}]")
-                train_set.to_csv(train_file_path, index=False)
+               #if train and test is not none then create a dir just to store the data under train and test file
+               #in csv
+                if train_set is not None:
+                    #creating train dir if not created to export the train csv data in it
+                    os.makedirs(self.data_ingestion_config.ingested_train_dir, exist_ok=True)
+                    logging.info(f"Exporting training dataset to file: [{train_file_path}]")
+                    self.export_data(dataframe=train_set, file_path=train_file_path)
 
-            if test_set is not None:
-                #creating test dir if not created to export the train data csv data in it
-                os.makedirs(self.data_ingestion_config.ingested_test_dir, exist_ok=True)
-                logging.info(f"Exporting test dataset to file: [{test_file_path}]")
-                test_set.to_csv(test_file_path, index=False)
+                if test_set is not None:
+                    #creating test dir if not created to export the train data csv data in it
+                    os.makedirs(self.data_ingestion_config.ingested_test_dir, exist_ok=True)
+                    logging.info(f"Exporting test dataset to file: [{test_file_path}]")
+                    self.export_data(dataframe=test_set, file_path=test_file_path)
 
 
             #make artifacts
@@ -128,10 +162,369 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+#all the shards under raw data dir, sorted so that the output does not depend on listing order
+    def get_raw_file_paths(self) -> list:
+        try:
+            raw_file_paths = sorted(glob.glob(os.path.join(self.data_ingestion_config.raw_data_dir,
+                                                           self.data_ingestion_config.raw_data_file_pattern)))
+            if len(raw_file_paths) == 0:
+                raise Exception(f"No file matching [{self.data_ingestion_config.raw_data_file_pattern}] "
+                                f"found in [{self.data_ingestion_config.raw_data_dir}]")
+            return raw_file_paths
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#single file keeps its own name, merged shards are named as per schema file
+#extension is changed to .npz if train and test are stored in columnar format
+    def get_ingested_file_name(self, raw_file_paths: list) -> str:
+        try:
+            if len(raw_file_paths) == 1:
+                file_name = os.path.basename(raw_file_paths[0])
+            else:
+                dataset_schema = read_yaml_file(file_path=self.data_ingestion_config.schema_file_path)
+                file_name = dataset_schema[DATASET_SCHEMA_FILE_NAME_KEY]
+            if self.is_columnar_output():
+                file_name = os.path.splitext(file_name)[0] + COLUMNAR_FILE_EXTENSION
+            return file_name
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#columnar file can not be appended, so chunked ingestion always writes csv
+    def is_columnar_output(self) -> bool:
+        try:
+            if self.data_ingestion_config.ingested_file_format == INGESTED_FILE_FORMAT_CSV:
+                return False
+            if self.data_ingestion_config.ingested_file_format != INGESTED_FILE_FORMAT_NPZ:
+                raise Exception(f"Unknown ingested file format: [{self.data_ingestion_config.ingested_file_format}]")
+            if self.data_ingestion_config.chunk_size:
+                logging.info(f"Chunked ingestion writes csv, ingested file format "
+                             f"[{self.data_ingestion_config.ingested_file_format}] is ignored")
+                return False
+            return True
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#writing train or test set as csv or as columnar npz file
+    def export_data(self, dataframe: pd.DataFrame, file_path: str):
+        try:
+            if self.is_columnar_output():
+                save_columnar_data(file_path=file_path, dataframe=dataframe)
+            else:
+                dataframe.to_csv(file_path, index=False)
+            return file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#number of processes used for shards, 0 in config means all the cpu
+    def get_num_workers(self, num_shards: int) -> int:
+        try:
+            num_workers = self.data_ingestion_config.num_workers or os.cpu_count() or 1
+            return max(1, min(num_workers, num_shards))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#reading one shard and making derived columns, it runs in a worker process
+    def read_raw_shard(self, raw_file_path: str, current_year: int) -> pd.DataFrame:
+        try:
+            #reading the raw data csv file with dtypes from schema, case id and year are not in schema
+            dataframe = read_csv_with_schema(file_path=raw_file_path,
+                                             schema_file_path=self.data_ingestion_config.schema_file_path,
+                                             extra_columns=[COLUMN_ID, COLUMN_YEAR_ESTB])
+            return self.add_derived_columns(dataframe=dataframe, current_year=current_year)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#reading all the shards in parallel and merging them in sorted shard order
+    def read_raw_data(self, raw_file_paths: list, current_year: int) -> pd.DataFrame:
+        try:
+            num_workers = self.get_num_workers(num_shards=len(raw_file_paths))
+            if num_workers == 1:
+                dataframes = [self.read_raw_shard(raw_file_path, current_year) for raw_file_path in raw_file_paths]
+            else:
+                logging.info(f"Reading [{len(raw_file_paths)}] shards with [{num_workers}] processes")
+                with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    dataframes = list(executor.map(self.read_raw_shard, raw_file_paths,
+                                                   [current_year] * len(raw_file_paths)))
+            if len(dataframes) == 1:
+                return dataframes[0]
+            return pd.concat(dataframes, ignore_index=True)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#every shard is split in chunks by a worker process into its own part files, then parts are joined in shard order
+    def split_shards_in_chunks(self, raw_file_paths: list, train_file_path: str, test_file_path: str,
+                               current_year: int):
+        try:
+            if len(raw_file_paths) == 1:
+                return self.split_data_in_chunks(us_visa_file_path=raw_file_paths[0],
+                                                 train_file_path=train_file_path,
+                                                 test_file_path=test_file_path,
+                                                 current_year=current_year)
+
+            parts_dir = os.path.join(os.path.dirname(self.data_ingestion_config.ingested_train_dir),
+                                     DATA_INGESTION_PARTS_DIR)
+            train_part_file_paths = [os.path.join(parts_dir, f"train_{index}.csv") for index in range(len(raw_file_paths))]
+            test_part_file_paths = [os.path.join(parts_dir, f"test_{index}.csv") for index in range(len(raw_file_paths))]
+
+            #test share of every class is decided over all the shards, so a row goes to same file in any shard
+            class_test_bins = self.get_class_test_bins(raw_file_paths=raw_file_paths)
+            num_workers = self.get_num_workers(num_shards=len(raw_file_paths))
+            logging.info(f"Splitting [{len(raw_file_paths)}] shards with [{num_workers}] processes")
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                class_counts = list(executor.map(self.split_data_in_chunks, raw_file_paths, train_part_file_paths,
+                                                 test_part_file_paths, [current_year] * len(raw_file_paths),
+                                                 [class_test_bins] * len(raw_file_paths)))
+
+            self.merge_csv_files(file_paths=train_part_file_paths, merged_file_path=train_file_path)
+            self.merge_csv_files(file_paths=test_part_file_paths, merged_file_path=test_file_path)
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            logging.info(f"Exported training dataset to file: [{train_file_path}]")
+            logging.info(f"Exported test dataset to file: [{test_file_path}]")
+
+            train_class_counts = pd.Series(dtype="int64")
+            test_class_counts = pd.Series(dtype="int64")
+            for shard_train_class_counts, shard_test_class_counts in class_counts:
+                train_class_counts = train_class_counts.add(shard_train_class_counts, fill_value=0)
+                test_class_counts = test_class_counts.add(shard_test_class_counts, fill_value=0)
+            self.check_class_ratios(train_class_counts=train_class_counts, test_class_counts=test_class_counts)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#joining csv files by copying bytes, header is taken from the first file only
+    @staticmethod
+    def merge_csv_files(file_paths: list, merged_file_path: str):
+        try:
+            os.makedirs(os.path.dirname(merged_file_path), exist_ok=True)
+            is_header_written = False
+            with open(merged_file_path, "wb") as merged_file:
+                for file_path in file_paths:
+                    if not os.path.exists(file_path):
+                        continue
+                    with open(file_path, "rb") as part_file:
+                        header = part_file.readline()
+                        if not is_header_written:
+                            merged_file.write(header)
+                            is_header_written = True
+                        shutil.copyfileobj(part_file, merged_file)
+            return merged_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#making company age column, dropping id and year columns and encoding target column
+#same logic is used for whole dataframe and for every chunk
+    @staticmethod
+    def add_derived_columns(dataframe: pd.DataFrame, current_year: int) -> pd.DataFrame:
+        try:
+            #making a new column
+            dataframe[COLUMN_COMPANY_AGE] = current_year-dataframe[COLUMN_YEAR_ESTB]
+
+            #drop some columns
+            dataframe.drop([COLUMN_ID,COLUMN_YEAR_ESTB], axis=1, inplace=True)
+            dataframe[COLUMN_CASE_STATUS] = np.where(dataframe[COLUMN_CASE_STATUS] == 'Denied', 1,0)
+            return dataframe
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#bin of every row from hash of its case id, same case id is always in same bin whatever the chunk or file order is
+    def get_hash_bins(self, case_ids: pd.Series) -> np.ndarray:
+        try:
+            hash_key = str(self.data_ingestion_config.random_state).zfill(16)[-16:]
+            hashes = pd.util.hash_pandas_object(case_ids.astype(str), index=False, hash_key=hash_key)
+            return (hashes.to_numpy() >> np.uint64(64 - DATA_INGESTION_HASH_BIN_BITS)).astype(np.int64)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#first pass over the raw files reading only case id and case status, rows of every class are counted per hash bin.
+#every class gets the number of lowest bins which holds test_size of its rows, so split is stratified on case status
+#and memory depends on number of bins and not on number of rows
+    def get_class_test_bins(self, raw_file_paths: list) -> dict:
+        try:
+            number_of_bins = 2 ** DATA_INGESTION_HASH_BIN_BITS
+            class_bin_counts = dict()
+            for raw_file_path in raw_file_paths:
+                chunks = pd.read_csv(raw_file_path, usecols=[COLUMN_ID, COLUMN_CASE_STATUS], dtype=str,
+                                     chunksize=self.data_ingestion_config.chunk_size)
+                for chunk in chunks:
+                    hash_bins = self.get_hash_bins(chunk[COLUMN_ID])
+                    case_statuses = chunk[COLUMN_CASE_STATUS].astype(str).to_numpy()
+                    for case_status in np.unique(case_statuses):
+                        bin_counts = np.bincount(hash_bins[case_statuses == case_status], minlength=number_of_bins)
+                        class_bin_counts[case_status] = class_bin_counts.get(case_status, 0) + bin_counts
+
+            class_test_bins = dict()
+            for case_status, bin_counts in class_bin_counts.items():
+                #rows in the lowest n bins for every n, n closest to test share of the class is taken
+                cumulative_counts = np.concatenate([[0], np.cumsum(bin_counts)])
+                test_count = self.data_ingestion_config.test_size * cumulative_counts[-1]
+                class_test_bins[case_status] = int(np.argmin(np.abs(cumulative_counts - test_count)))
+            return class_test_bins
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#row goes to test when its hash bin is one of the test bins of its case status
+    def get_test_row_mask(self, case_ids: pd.Series, case_statuses: pd.Series, class_test_bins: dict) -> np.ndarray:
+        try:
+            hash_bins = self.get_hash_bins(case_ids)
+            case_statuses = case_statuses.astype(str).to_numpy()
+            test_row_mask = np.zeros(len(hash_bins), dtype=bool)
+            for case_status, test_bins in class_test_bins.items():
+                test_row_mask |= (case_statuses == case_status) & (hash_bins < test_bins)
+            return test_row_mask
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#test share of every class must be test_size, within tolerance for rows of the boundary bin
+    def check_class_ratios(self, train_class_counts: pd.Series, test_class_counts: pd.Series):
+        try:
+            test_size = self.data_ingestion_config.test_size
+            class_counts = train_class_counts.add(test_class_counts, fill_value=0)
+            for case_status, class_count in class_counts.items():
+                test_count = test_class_counts.get(case_status, 0)
+                test_ratio = test_count / class_count
+                logging.info(f"Case status [{case_status}] test ratio: [{test_ratio:.4f}] "
+                             f"({int(test_count)} of {int(class_count)} rows)")
+                if abs(test_ratio - test_size) > DATA_INGESTION_CLASS_RATIO_TOLERANCE:
+                    raise Exception(f"Test ratio [{test_ratio:.4f}] of case status [{case_status}] is not within "
+                                    f"[{DATA_INGESTION_CLASS_RATIO_TOLERANCE}] of test size [{test_size}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#reading raw file chunk by chunk and appending every chunk to train or test file
+    def split_data_in_chunks(self, us_visa_file_path: str, train_file_path: str, test_file_path: str,
+                             current_year: int, class_test_bins: dict = None):
+        """
+        class_test_bins: test bins of every case status, computed from us_visa_file_path if not given
+        return: class counts of train and test rows, checked against test_size when the file is split alone
+        """
+        try:
+            is_single_file = class_test_bins is None
+            if is_single_file:
+                class_test_bins = self.get_class_test_bins(raw_file_paths=[us_visa_file_path])
+            logging.info(f"Splitting [{us_visa_file_path}] into train and test in chunks of "
+                         f"[{self.data_ingestion_config.chunk_size}] rows")
+            os.makedirs(os.path.dirname(train_file_path), exist_ok=True)
+            os.makedirs(os.path.dirname(test_file_path), exist_ok=True)
+
+            chunks = read_csv_with_schema(file_path=us_visa_file_path,
+                                          schema_file_path=self.data_ingestion_config.schema_file_path,
+                                          extra_columns=[COLUMN_ID, COLUMN_YEAR_ESTB],
+                                          chunksize=self.data_ingestion_config.chunk_size)
+            train_class_counts = pd.Series(dtype="int64")
+            test_class_counts = pd.Series(dtype="int64")
+            is_first_chunk = True
+            for chunk in chunks:
+                test_row_mask = self.get_test_row_mask(case_ids=chunk[COLUMN_ID],
+                                                       case_statuses=chunk[COLUMN_CASE_STATUS],
+                                                       class_test_bins=class_test_bins)
+                chunk = self.add_derived_columns(dataframe=chunk, current_year=current_year)
+
+                train_chunk = chunk[~test_row_mask]
+                test_chunk = chunk[test_row_mask]
+                write_mode = "w" if is_first_chunk else "a"
+                train_chunk.to_csv(train_file_path, index=False, mode=write_mode, header=is_first_chunk)
+                test_chunk.to_csv(test_file_path, index=False, mode=write_mode, header=is_first_chunk)
+                is_first_chunk = False
+
+                train_class_counts = train_class_counts.add(train_chunk[COLUMN_CASE_STATUS].value_counts(), fill_value=0)
+                test_class_counts = test_class_counts.add(test_chunk[COLUMN_CASE_STATUS].value_counts(), fill_value=0)
+
+            logging.info(f"Exported training dataset to file: [{train_file_path}] "
+                         f"class counts: {train_class_counts.astype('int64').to_dict()}")
+            logging.info(f"Exported test dataset to file: [{test_file_path}] "
+                         f"class counts: {test_class_counts.astype('int64').to_dict()}")
+            if is_single_file:
+                self.check_class_ratios(train_class_counts=train_class_counts, test_class_counts=test_class_counts)
+            return train_class_counts, test_class_counts
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#cache key is made from the content of raw file, split params, schema and current year
+#company age depends on current year so the split of last year can not be reused
+    def get_ingestion_cache_key(self, raw_file_paths: list) -> str:
+        try:
+            raw_file_hashes = [f"{os.path.basename(raw_file_path)}:{get_file_hash(raw_file_path)}"
+                               for raw_file_path in raw_file_paths]
+            return get_cache_key(*raw_file_hashes,
+                                 get_file_hash(self.data_ingestion_config.schema_file_path),
+                                 self.data_ingestion_config.test_size,
+                                 self.data_ingestion_config.random_state,
+                                 self.data_ingestion_config.chunk_size,
+                                 self.data_ingestion_config.ingested_file_format,
+                                 DATA_INGESTION_SPLIT_VERSION,
+                                 date.today().year)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#if we already split the same data, train and test files are linked from cache instead of splitting again
+    def load_from_cache(self, cache_key: str, file_name: str):
+        try:
+            cache_entry_dir = os.path.join(self.data_ingestion_config.cache_dir, cache_key)
+            cached_train_file_path = os.path.join(cache_entry_dir, DATA_INGESTION_CACHE_TRAIN_DIR, file_name)
+            cached_test_file_path = os.path.join(cache_entry_dir, DATA_INGESTION_CACHE_TEST_DIR, file_name)
+
+            if not (os.path.exists(cached_train_file_path) and os.path.exists(cached_test_file_path)):
+                logging.info(f"Ingestion cache miss for key: [{cache_key}]")
+                return None
+
+            train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir, file_name)
+            test_file_path = os.path.join(self.data_ingestion_config.ingested_test_dir, file_name)
+
+            logging.info(f"Ingestion cache hit for key: [{cache_key}], reusing [{cache_entry_dir}]")
+            link_or_copy_file(src=cached_train_file_path, dst=train_file_path)
+            link_or_copy_file(src=cached_test_file_path, dst=test_file_path)
+
+            data_ingestion_artifact = DataIngestionArtifact(train_file_path=train_file_path,
+                                                            test_file_path=test_file_path,
+                                                            is_ingested=True,
+                                                            message=f"Data ingestion reused cached split [{cache_key}]."
+                                                            )
+            logging.info(f"Data Ingestion artifact:[{data_ingestion_artifact}]")
+            return data_ingestion_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#storing train and test file in cache, first in temp dir and then rename so half written entry is never used
+    def save_to_cache(self, cache_key: str, data_ingestion_artifact: DataIngestionArtifact):
+        try:
+            cache_entry_dir = os.path.join(self.data_ingestion_config.cache_dir, cache_key)
+            if os.path.exists(cache_entry_dir):
+                return cache_entry_dir
+
+            temp_entry_dir = f"{cache_entry_dir}.tmp{os.getpid()}"
+            link_or_copy_file(src=data_ingestion_artifact.train_file_path,
+                              dst=os.path.join(temp_entry_dir, DATA_INGESTION_CACHE_TRAIN_DIR,
+                                               os.path.basename(data_ingestion_artifact.train_file_path)))
+            link_or_copy_file(src=data_ingestion_artifact.test_file_path,
+                              dst=os.path.join(temp_entry_dir, DATA_INGESTION_CACHE_TEST_DIR,
+                                               os.path.basename(data_ingestion_artifact.test_file_path)))
+            write_yaml_file(file_path=os.path.join(temp_entry_dir, DATA_INGESTION_CACHE_INFO_FILE_NAME),
+                            data={"dataset_download_url": self.data_ingestion_config.dataset_download_url,
+                                  "test_size": self.data_ingestion_config.test_size,
+                                  "random_state": self.data_ingestion_config.random_state,
+                                  "created_at": CURRENT_TIME_STAMP})
+            try:
+                os.rename(temp_entry_dir, cache_entry_dir)
+            except OSError:
+                #another run already stored the same entry
+                shutil.rmtree(temp_entry_dir, ignore_errors=True)
+            logging.info(f"Stored ingested data in cache: [{cache_entry_dir}]")
+            return cache_entry_dir
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     #initiate data ingestion
     def initiate_data_ingestion(self):
         try:
-            raw_file_path = self.download_data()
-            return self.split_data_as_train_test()
+            self.download_data()
+            raw_file_paths = self.get_raw_file_paths()
+            cache_key = self.get_ingestion_cache_key(raw_file_paths=raw_file_paths)
+            data_ingestion_artifact = self.load_from_cache(cache_key=cache_key,
+                                                           file_name=self.get_ingested_file_name(raw_file_paths))
+            if data_ingestion_artifact is not None:
+                return data_ingestion_artifact
+
+            data_ingestion_artifact = self.split_data_as_train_test()
+            self.save_to_cache(cache_key=cache_key, data_ingestion_artifact=data_ingestion_artifact)
+            return data_ingestion_artifact
         except Exception as e:
-            raise CustomException(e, sys)from e
\ No newline at end of file
+            raise CustomException(e, sys)from e
@@ -1,4 +1,5 @@
 import os, sys
+import shutil
 import pandas as pd
 import numpy as np
 from visa.exception import CustomException
@@ -6,12 +7,17 @@ from visa.logger import logging
 from visa.entity.config_entity import DataTransformationConfig
 from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact
 from sklearn.compose import ColumnTransformer
-from visa.utils.utils import read_yaml_file, load_data, save_numpy_array_data, save_object
+from visa.utils.utils import read_yaml_file, write_yaml_file, load_data, save_numpy_array_data, save_object, \
+    get_file_hash, get_cache_key, link_or_copy_file, read_data_profile
 from visa.constant import *
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OrdinalEncoder, OneHotEncoder, PowerTransformer
 from imblearn.combine import SMOTEENN
+from imblearn.over_sampling import SMOTE, RandomOverSampler
+from imblearn.under_sampling import RandomUnderSampler
+from visa.entity.custom_transformers import OutlierCapper
+from visa.entity.compiled_preprocessor import compile_preprocessing_object
 
 class DataTransformation:
 
@@ -39,7 +45,15 @@ class DataTransformation:
             onehot_columns = dataset_schema[ONE_HOT_COLUMN_KEY]
             transform_columns = dataset_schema[TRANSFORM_COLUMN_KEY]
 
+            #quartiles and cardinality of train data are taken from validation report if available
+            train_data_profile = read_data_profile(report_file_path=self.data_validation_artifact.report_file_path)
+            if train_data_profile is not None:
+                train_data_profile = {column: train_data_profile[column] for column in numerical_columns
+                                      if column in train_data_profile}
+
+            #outlier limits are learned on train data and saved with the preprocessor, so prediction data is capped too
             num_pipeline = Pipeline(steps=[
+                ('outlier_capper', OutlierCapper(factor=1.5, min_unique_values=25, data_profile=train_data_profile)),
                 ('imputer', SimpleImputer(strategy='median')),
                 ('scaler', StandardScaler())
             ]
@@ -78,20 +92,131 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys) from e
         
-    def _remove_outliers_IQR(self, col, df):
+#sampler for the rebalancing strategy, None when training data is kept as it is (class_weight and none)
+#smoteenn is the most expensive one, knn based oversampling and cleaning grow faster than number of rows
+    @staticmethod
+    def get_resampler_object(strategy: str, sampling_strategy="all", random_state: int = 42):
         try:
-            percentile25 = df[col].quantile(0.25)
-            percentile75 = df[col].quantile(0.75)
-            iqr = percentile75 - percentile25
-            upper_limit = percentile75 + 1.5 * iqr
-            lower_limit = percentile25 - 1.5 * iqr
-            df.loc[(df[col]>upper_limit), col]= upper_limit
-            df.loc[(df[col]<lower_limit), col]= lower_limit 
-            return df
-        
+            if strategy == REBALANCING_STRATEGY_SMOTEENN:
+                return SMOTEENN(random_state=random_state, sampling_strategy=sampling_strategy)
+            if strategy == REBALANCING_STRATEGY_SMOTE:
+                return SMOTE(random_state=random_state, sampling_strategy=sampling_strategy)
+            if strategy == REBALANCING_STRATEGY_RANDOM_OVER:
+                return RandomOverSampler(random_state=random_state, sampling_strategy=sampling_strategy)
+            if strategy == REBALANCING_STRATEGY_RANDOM_UNDER:
+                return RandomUnderSampler(random_state=random_state, sampling_strategy=sampling_strategy)
+            if strategy in [REBALANCING_STRATEGY_CLASS_WEIGHT, REBALANCING_STRATEGY_NONE]:
+                return None
+            raise Exception(f"Rebalancing strategy [{strategy}] is not one of {REBALANCING_STRATEGIES}")
         except Exception as e:
-            raise CustomException(e, sys) from e 
-        
+            raise CustomException(e, sys) from e
+
+#features and target file path of one dataset
+    @staticmethod
+    def get_array_file_paths(transformed_dir: str, file_name: str):
+        return (os.path.join(transformed_dir, file_name + DATA_TRANSFORMATION_FEATURES_FILE_SUFFIX + NUMPY_ARRAY_FILE_EXTENSION),
+                os.path.join(transformed_dir, file_name + DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + NUMPY_ARRAY_FILE_EXTENSION))
+
+#fingerprint of train data, test data, schema and preprocessing params, same key means same fitted result
+    def get_transformation_cache_key(self, preprocessing_obj: ColumnTransformer) -> str:
+        try:
+            return get_cache_key(get_file_hash(self.data_ingestion_artifact.train_file_path),
+                                 get_file_hash(self.data_ingestion_artifact.test_file_path),
+                                 get_file_hash(self.data_validation_artifact.schema_file_path),
+                                 preprocessing_obj.get_params(deep=True),
+                                 self.data_transformation_config.rebalancing_strategy,
+                                 self.data_transformation_config.rebalancing_sampling_strategy,
+                                 self.data_transformation_config.rebalancing_random_state,
+                                 self.data_transformation_config.transformed_array_dtype,
+                                 DATA_TRANSFORMATION_CACHE_VERSION)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#paths in one cache entry of the preprocessing object and transformed arrays, train and test arrays keep their folder
+    def get_cache_file_paths(self, cache_entry_dir: str, file_paths: list) -> list:
+        try:
+            cache_sub_dirs = {self.data_transformation_config.transformed_train_dir: DATA_TRANSFORMATION_CACHE_TRAIN_DIR,
+                              self.data_transformation_config.transformed_test_dir: DATA_TRANSFORMATION_CACHE_TEST_DIR}
+            return [os.path.join(cache_entry_dir, cache_sub_dirs.get(os.path.dirname(file_path), ""),
+                                 os.path.basename(file_path))
+                    for file_path in file_paths]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#every file of the artifact, resampled train files are same as train files when training data is not resampled
+#compiled preprocessing object is None when it could not be compiled
+    @staticmethod
+    def get_artifact_file_paths(data_transformation_artifact: DataTransformationArtifact) -> list:
+        file_paths = [data_transformation_artifact.preprocessed_object_file_path,
+                      data_transformation_artifact.transformed_train_file_path,
+                      data_transformation_artifact.transformed_train_target_file_path,
+                      data_transformation_artifact.resampled_train_file_path,
+                      data_transformation_artifact.resampled_train_target_file_path,
+                      data_transformation_artifact.transformed_test_file_path,
+                      data_transformation_artifact.transformed_test_target_file_path,
+                      data_transformation_artifact.compiled_preprocessed_object_file_path]
+        return list(dict.fromkeys(file_path for file_path in file_paths if file_path is not None))
+
+#if same data was already transformed, fitted object and arrays are linked from cache instead of fitting again
+    def load_from_cache(self, cache_key: str,
+                        data_transformation_artifact: DataTransformationArtifact) -> DataTransformationArtifact:
+        try:
+            cache_entry_dir = os.path.join(self.data_transformation_config.cache_dir, cache_key)
+            #compiled preprocessing object is optional, entry without it is still used
+            compiled_file_path = data_transformation_artifact.compiled_preprocessed_object_file_path
+            data_transformation_artifact = data_transformation_artifact._replace(
+                compiled_preprocessed_object_file_path=None)
+            file_paths = DataTransformation.get_artifact_file_paths(data_transformation_artifact)
+            cached_file_paths = self.get_cache_file_paths(cache_entry_dir=cache_entry_dir, file_paths=file_paths)
+            if not all(os.path.exists(cached_file_path) for cached_file_path in cached_file_paths):
+                logging.info(f"Transformation cache miss for key: [{cache_key}]")
+                return None
+
+            logging.info(f"Transformation cache hit for key: [{cache_key}], reusing [{cache_entry_dir}]")
+            for cached_file_path, file_path in zip(cached_file_paths, file_paths):
+                link_or_copy_file(src=cached_file_path, dst=file_path)
+
+            cached_compiled_file_path = self.get_cache_file_paths(cache_entry_dir=cache_entry_dir,
+                                                                  file_paths=[compiled_file_path])[0]
+            if os.path.exists(cached_compiled_file_path):
+                link_or_copy_file(src=cached_compiled_file_path, dst=compiled_file_path)
+                data_transformation_artifact = data_transformation_artifact._replace(
+                    compiled_preprocessed_object_file_path=compiled_file_path)
+
+            data_transformation_artifact = data_transformation_artifact._replace(
+                message=f"Data transformation reused cached result [{cache_key}].")
+            logging.info(f"Data transformation artifact: {data_transformation_artifact}")
+            return data_transformation_artifact
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#storing fitted object and arrays in cache, first in temp dir and then rename so half written entry is never used
+    def save_to_cache(self, cache_key: str, data_transformation_artifact: DataTransformationArtifact):
+        try:
+            cache_entry_dir = os.path.join(self.data_transformation_config.cache_dir, cache_key)
+            if os.path.exists(cache_entry_dir):
+                return cache_entry_dir
+
+            temp_entry_dir = f"{cache_entry_dir}.tmp{os.getpid()}"
+            file_paths = DataTransformation.get_artifact_file_paths(data_transformation_artifact)
+            cached_file_paths = self.get_cache_file_paths(cache_entry_dir=temp_entry_dir, file_paths=file_paths)
+            for file_path, cached_file_path in zip(file_paths, cached_file_paths):
+                link_or_copy_file(src=file_path, dst=cached_file_path)
+            write_yaml_file(file_path=os.path.join(temp_entry_dir, DATA_TRANSFORMATION_CACHE_INFO_FILE_NAME),
+                            data={"train_file_path": self.data_ingestion_artifact.train_file_path,
+                                  "test_file_path": self.data_ingestion_artifact.test_file_path,
+                                  "schema_file_path": self.data_validation_artifact.schema_file_path,
+                                  "created_at": CURRENT_TIME_STAMP})
+            try:
+                os.rename(temp_entry_dir, cache_entry_dir)
+            except OSError:
+                #another run already stored the same entry
+                shutil.rmtree(temp_entry_dir, ignore_errors=True)
+            logging.info(f"Stored transformed data in cache: [{cache_entry_dir}]")
+            return cache_entry_dir
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_data_transformation(self) -> DataTransformationArtifact:
         try:
             logging.info(f"Obtaining preprocessing object.")
@@ -103,6 +228,48 @@ class DataTransformation:
 
             schema_file_path = self.data_validation_artifact.schema_file_path
 
+            transformed_train_dir = self.data_transformation_config.transformed_train_dir
+            transformed_test_dir = self.data_transformation_config.transformed_test_dir
+
+            train_file_name = os.path.splitext(os.path.basename(train_file_path))[0]
+            test_file_name = os.path.splitext(os.path.basename(test_file_path))[0]
+
+            #features and target of every dataset in separate npy files
+            transformed_train_file_path, transformed_train_target_file_path = \
+                DataTransformation.get_array_file_paths(transformed_train_dir, train_file_name)
+            transformed_test_file_path, transformed_test_target_file_path = \
+                DataTransformation.get_array_file_paths(transformed_test_dir, test_file_name)
+
+            #training data is rebalanced in separate files, train files keep the real rows for training metrics
+            resampler = DataTransformation.get_resampler_object(
+                strategy=self.data_transformation_config.rebalancing_strategy,
+                sampling_strategy=self.data_transformation_config.rebalancing_sampling_strategy,
+                random_state=self.data_transformation_config.rebalancing_random_state)
+            resampled_train_file_path, resampled_train_target_file_path = \
+                transformed_train_file_path, transformed_train_target_file_path
+            if resampler is not None:
+                resampled_train_file_path, resampled_train_target_file_path = DataTransformation.get_array_file_paths(
+                    transformed_train_dir, train_file_name + DATA_TRANSFORMATION_RESAMPLED_FILE_SUFFIX)
+
+            preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
+            data_transformation_artifact = DataTransformationArtifact(is_transformed=True,
+                                                                      message="Data transformation successfull.",
+                                                                      transformed_train_file_path=transformed_train_file_path,
+                                                                      transformed_test_file_path=transformed_test_file_path,
+                                                                      preprocessed_object_file_path=preprocessing_obj_file_path,
+                                                                      resampled_train_file_path=resampled_train_file_path,
+                                                                      transformed_train_target_file_path=transformed_train_target_file_path,
+                                                                      transformed_test_target_file_path=transformed_test_target_file_path,
+                                                                      resampled_train_target_file_path=resampled_train_target_file_path,
+                                                                      compiled_preprocessed_object_file_path=self.data_transformation_config.compiled_preprocessed_object_file_path
+                                                                      )
+
+            cache_key = self.get_transformation_cache_key(preprocessing_obj=preprocessing_obj)
+            cached_data_transformation_artifact = self.load_from_cache(cache_key=cache_key,
+                                                                       data_transformation_artifact=data_transformation_artifact)
+            if cached_data_transformation_artifact is not None:
+                return cached_data_transformation_artifact
+
             logging.info(f"Loading training and test data as pandas dataframe.")
             train_df = load_data(file_path=train_file_path, schema_file_path=schema_file_path)
 
@@ -111,19 +278,6 @@ class DataTransformation:
             schema = read_yaml_file(file_path=schema_file_path)
 
             target_column_name = schema[TARGET_COLUMN_KEY]
-            numerical_columns = schema[NUMERICAL_COLUMN_KEY]
-            
-            continuous_columns=[feature for feature in numerical_columns if len(train_df[feature].unique())>=25]
-            
-            for col in continuous_columns:
-                self._remove_outliers_IQR(col=col, df= train_df)
-            
-            logging.info(f"Outlier capped in train df")
-            
-            for col in continuous_columns:
-                self._remove_outliers_IQR(col=col, df= test_df)
-                
-            logging.info(f"Outlier capped in test df")            
 
             logging.info(f"Splitting input and target feature from training and testing dataframe.")
             input_feature_train_df = train_df.drop(columns=[target_column_name], axis=1)
@@ -137,42 +291,43 @@ class DataTransformation:
             input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
             input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
             
-            smt = SMOTEENN(random_state=42,sampling_strategy='all') # all
-            
-            input_feature_train_arr, target_feature_train_df = smt.fit_resample(input_feature_train_arr, target_feature_train_df)
-            
-            input_feature_test_arr, target_feature_test_df = smt.fit_resample(input_feature_test_arr , target_feature_test_df)
-
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
-
-            transformed_train_dir = self.data_transformation_config.transformed_train_dir
-            transformed_test_dir = self.data_transformation_config.transformed_test_dir
-
-            train_file_name = os.path.basename(train_file_path).replace(".csv", ".npz")
-            test_file_name = os.path.basename(test_file_path).replace(".csv", ".npz")
-
-            transformed_train_file_path = os.path.join(transformed_train_dir, train_file_name)
-            transformed_test_file_path = os.path.join(transformed_test_dir, test_file_name)
-
             logging.info(f"Saving transformed training and test array.")
+            array_dtype = self.data_transformation_config.transformed_array_dtype
+            save_numpy_array_data(file_path=transformed_train_file_path, array=input_feature_train_arr, dtype=array_dtype)
+            save_numpy_array_data(file_path=transformed_train_target_file_path, array=np.asarray(target_feature_train_df))
+            save_numpy_array_data(file_path=transformed_test_file_path, array=input_feature_test_arr, dtype=array_dtype)
+            save_numpy_array_data(file_path=transformed_test_target_file_path, array=np.asarray(target_feature_test_df))
 
-            save_numpy_array_data(file_path=transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(file_path=transformed_test_file_path, array=test_arr)
-
-            preprocessing_obj_file_path = self.data_transformation_config.preprocessed_object_file_path
+            #only training data is rebalanced, test data keeps the real class ratio for evaluation
+            if resampler is not None:
+                logging.info(f"Rebalancing training data with: [{resampler}]")
+                resampled_input_feature_train_arr, resampled_target_feature_train = resampler.fit_resample(
+                    input_feature_train_arr, target_feature_train_df)
+                save_numpy_array_data(file_path=resampled_train_file_path, array=resampled_input_feature_train_arr,
+                                      dtype=array_dtype)
+                save_numpy_array_data(file_path=resampled_train_target_file_path,
+                                      array=np.asarray(resampled_target_feature_train))
+            else:
+                logging.info(f"Training data is not resampled, rebalancing strategy: "
+                             f"[{self.data_transformation_config.rebalancing_strategy}]")
 
             logging.info(f"Saving preprocessing object.")
             save_object(file_path=preprocessing_obj_file_path, obj=preprocessing_obj)
 
-            data_transformation_artifact = DataTransformationArtifact(is_transformed=True,
-                                                                      message="Data transformation successfull.",
-                                                                      transformed_train_file_path=transformed_train_file_path,
-                                                                      transformed_test_file_path=transformed_test_file_path,
-                                                                      preprocessed_object_file_path=preprocessing_obj_file_path
-                                                                      )
+            #numpy only copy of the fitted object for fast prediction, checked on test data to give exactly same output
+            compiled_preprocessing_obj_file_path = data_transformation_artifact.compiled_preprocessed_object_file_path
+            try:
+                compiled_preprocessing_obj = compile_preprocessing_object(preprocessing_object=preprocessing_obj,
+                                                                          X=input_feature_test_df)
+                logging.info(f"Saving compiled preprocessing object.")
+                save_object(file_path=compiled_preprocessing_obj_file_path, obj=compiled_preprocessing_obj)
+            except CustomException as e:
+                logging.info(f"Preprocessing object is not compiled, prediction uses preprocessing object: {e}")
+                data_transformation_artifact = data_transformation_artifact._replace(
+                    compiled_preprocessed_object_file_path=None)
+
             logging.info(f"Data transformation artifact: {data_transformation_artifact}")
+            self.save_to_cache(cache_key=cache_key, data_transformation_artifact=data_transformation_artifact)
             return data_transformation_artifact
         except Exception as e:
             raise CustomException(e, sys) from e
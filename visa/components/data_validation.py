@@ -7,8 +7,9 @@ from visa.entity.config_entity import DataValidationConfig
 from visa.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from visa.config.configuration import Configuartion
 from visa.exception import CustomException
-from visa.utils.utils import read_yaml_file
-from visa.entity.raw_data_validation import IngestedDataValidation
+from visa.utils.utils import read_yaml_file, write_yaml_file
+from visa.entity.raw_data_validation import IngestedDataValidation, IngestedDataValidationResult
+from concurrent.futures import ProcessPoolExecutor
 
 class DataValidation:
 #getting the data from data ingestion artifact and then we are validating
@@ -35,6 +36,10 @@ class DataValidation:
             
             self.test_data = IngestedDataValidation(
                 validate_path=self.data_ingestion_artifact.test_file_path, schema_path=self.schema_path)
+
+            #filled by is_Validation_successfull
+            self.train_result = None
+            self.test_result = None
         except Exception as e:
             raise CustomException(e, sys) from e
 
@@ -58,64 +63,33 @@ class DataValidation:
 
 
 #validating the function that we defined in raw datavalidation file  for both the datasets
-#calling ever functions to validate both train and test data
+#every file is read only once and all the checks are computed from that single read
     def is_Validation_successfull(self):
         try:
             validation_status = True
             logging.info("Validation Process Started")
             if self.isFolderPathAvailable() == True:
 
-                 #validating all the functions on train data
-                train_filename = os.path.basename(
-                    self.data_ingestion_artifact.train_file_path)
-
-                #validating train file name
-                is_train_filename_validated = self.train_data.validate_filename(
-                    file_name=train_filename)
-
-                #validating column length
-                is_train_column_numbers_validated = self.train_data.validate_column_length()
-
-                #validating column names
-                is_train_column_name_same = self.train_data.check_column_names()
-
-                is_train_missing_values_whole_column = self.train_data.missing_values_whole_column()
-
-                self.train_data.replace_null_values_with_null()
-
-
-                #validatings all the functins on test data
-
-                test_filename = os.path.basename(
-                    self.data_ingestion_artifact.test_file_path)
-
-                is_test_filename_validated = self.test_data.validate_filename(
-                    file_name=test_filename)
-
-                is_test_column_numbers_validated = self.test_data.validate_column_length()
+                #validating train and test data at the same time
+                train_result, test_result = self.validate_train_and_test_data()
+                self.train_result = train_result
+                self.test_result = test_result
 
-                is_test_column_name_same = self.test_data.check_column_names()
-
-                is_test_missing_values_whole_column = self.test_data.missing_values_whole_column()
-
-                self.test_data.replace_null_values_with_null()
+                #report is written before raising so a failed validation can also be checked
+                self.save_validation_report(train_result=train_result, test_result=test_result)
 
                 logging.info(
-                    f"Train_set status|is Train filename validated?: {is_train_filename_validated}|is train columns validated?: {is_train_column_numbers_validated}|is train column name validated?: {is_train_column_name_same}|whole missing columns?{is_train_missing_values_whole_column}")
+                    f"Train_set status|is Train filename validated?: {train_result.is_filename_validated}|is train columns validated?: {train_result.is_column_numbers_validated}|is train column name validated?: {train_result.is_column_names_validated}|whole missing columns?{train_result.is_missing_values_whole_column}")
                 logging.info(
-                    f"Test_set status|is Test filename validated?: {is_test_filename_validated}is test col numbers validated?: {is_test_column_numbers_validated}|is test column names validated? {is_test_column_name_same}| whole missing columns? {is_test_missing_values_whole_column}")
+                    f"Test_set status|is Test filename validated?: {test_result.is_filename_validated}is test col numbers validated?: {test_result.is_column_numbers_validated}|is test column names validated? {test_result.is_column_names_validated}| whole missing columns? {test_result.is_missing_values_whole_column}")
 
-                if is_train_filename_validated & is_train_column_numbers_validated & is_train_column_name_same & is_train_missing_values_whole_column:
-                    pass
-                else:
+                if not train_result.is_validated:
                     validation_status = False
                     logging.info("Check yout Training Data! Validation Failed")
                     raise ValueError(
                         "Check your Training data! Validation failed")
 
-                if is_test_filename_validated & is_test_column_numbers_validated & is_test_column_name_same & is_test_missing_values_whole_column:
-                    pass
-                else:
+                if not test_result.is_validated:
                     validation_status = False
                     logging.info("Check your Test data! Validation failed")
                     raise ValueError(
@@ -128,12 +102,45 @@ class DataValidation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+#train and test file are read and checked in two processes, 1 worker means one after another
+    def validate_train_and_test_data(self):
+        try:
+            if self.data_validation_config.num_workers and self.data_validation_config.num_workers > 1:
+                with ProcessPoolExecutor(max_workers=2) as executor:
+                    train_future = executor.submit(self.train_data.validate)
+                    test_future = executor.submit(self.test_data.validate)
+                    return train_future.result(), test_future.result()
+            return self.train_data.validate(), self.test_data.validate()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#writing checks and column statistics of both the files in the validation report
+    def save_validation_report(self, train_result: IngestedDataValidationResult,
+                               test_result: IngestedDataValidationResult):
+        try:
+            validation_report = {}
+            for report_key, result in [(VALIDATION_REPORT_TRAIN_KEY, train_result),
+                                       (VALIDATION_REPORT_TEST_KEY, test_result)]:
+                validation_report[report_key] = {
+                    VALIDATION_REPORT_FILE_PATH_KEY: result.file_path,
+                    VALIDATION_REPORT_IS_VALIDATED_KEY: result.is_validated,
+                    VALIDATION_REPORT_NUMBER_OF_ROWS_KEY: result.number_of_rows,
+                    VALIDATION_REPORT_PROFILE_KEY: result.profile,
+                }
+            report_file_path = self.data_validation_config.report_file_path
+            write_yaml_file(file_path=report_file_path, data=validation_report)
+            logging.info(f"Validation report saved at: [{report_file_path}]")
+            return report_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_data_validation(self):
         try:
             #we have to paas the things that are defined in artifact_entity
             data_validation_artifact = DataValidationArtifact(
                 schema_file_path=self.schema_path, is_validated=self.is_Validation_successfull(),
-                message="Data validation performed"
+                message="Data validation performed",
+                report_file_path=self.data_validation_config.report_file_path
             )
             logging.info(
                 f"Data validation artifact: {data_validation_artifact}")
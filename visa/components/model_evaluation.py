@@ -7,8 +7,10 @@ from visa.exception import CustomException
 from visa.entity.config_entity import ModelEvaluationConfig
 from visa.entity.artifact_entity import DataIngestionArtifact,DataValidationArtifact,ModelTrainerArtifact,ModelEvaluationArtifact
 from visa.constant import *
-from visa.utils.utils import write_yaml_file, read_yaml_file, load_object, load_data
-from visa.entity.model_factory import evaluate_classification_model
+from visa.utils.utils import write_yaml_file, read_yaml_file, load_object, load_data, get_file_hash, get_cache_key
+from visa.entity.model_factory import MetricInfoArtifact, get_model_predictions, get_metric_info, get_best_metric_info
+import os
+import shutil
 
 
 # Get the best model from all the trained model from model trainer 
@@ -31,9 +33,8 @@ class ModelEvaluation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def get_best_model(self):
+    def get_best_model_path(self) -> str:
         try:
-            model = None
             #calling the best model from  evaluation.yaml file
             model_evaluation_file_path = self.model_evaluation_config.model_evaluation_file_path
 
@@ -42,7 +43,7 @@ class ModelEvaluation:
             if not os.path.exists(model_evaluation_file_path):
                 write_yaml_file(file_path=model_evaluation_file_path,
                                 )
-                return model
+                return None
 
             #to get the final model from evaluation file to push it in saved model 
             model_eval_file_content = read_yaml_file(file_path=model_evaluation_file_path)
@@ -51,10 +52,77 @@ class ModelEvaluation:
             model_eval_file_content = dict() if model_eval_file_content is None else model_eval_file_content
 
             if BEST_MODEL_KEY not in model_eval_file_content:
-                return model
+                return None
 
-            model = load_object(file_path=model_eval_file_content[BEST_MODEL_KEY][MODEL_PATH_KEY])
-            return model
+            return model_eval_file_content[BEST_MODEL_KEY][MODEL_PATH_KEY]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_best_model(self):
+        try:
+            best_model_path = self.get_best_model_path()
+            if best_model_path is None:
+                return None
+            return load_object(file_path=best_model_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#best model gives same predictions till its file and train and test data are same
+    def get_best_model_cache_key(self, best_model_path: str) -> str:
+        try:
+            return get_cache_key(get_file_hash(best_model_path),
+                                 get_file_hash(self.data_ingestion_artifact.train_file_path),
+                                 get_file_hash(self.data_ingestion_artifact.test_file_path),
+                                 get_file_hash(self.data_validation_artifact.schema_file_path),
+                                 MODEL_EVALUATION_CACHE_VERSION)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#metrics of best model saved by an earlier run, None if it is not in cache
+    def load_best_model_metric_info(self, cache_key: str, model) -> MetricInfoArtifact:
+        try:
+            metrics_file_path = os.path.join(self.model_evaluation_config.cache_dir, cache_key,
+                                             MODEL_EVALUATION_CACHE_METRICS_FILE_NAME)
+            if not os.path.exists(metrics_file_path):
+                logging.info(f"Best model evaluation cache miss for key: [{cache_key}]")
+                return None
+
+            logging.info(f"Best model evaluation cache hit for key: [{cache_key}]")
+            metrics = read_yaml_file(file_path=metrics_file_path)
+            train_acc = metrics[MODEL_EVALUATION_TRAIN_ACCURACY_KEY]
+            test_acc = metrics[MODEL_EVALUATION_TEST_ACCURACY_KEY]
+            return MetricInfoArtifact(model_name=str(model),
+                                      model_object=model,
+                                      train_f1=metrics[MODEL_EVALUATION_TRAIN_F1_KEY],
+                                      test_f1=metrics[MODEL_EVALUATION_TEST_F1_KEY],
+                                      train_accuracy=train_acc,
+                                      test_accuracy=test_acc,
+                                      model_accuracy=(2 * (train_acc * test_acc)) / (train_acc + test_acc),
+                                      index_number=0)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#storing metrics of best model, first in temp dir and then rename so half written entry is never used
+    def save_best_model_metric_info(self, cache_key: str, metric_info: MetricInfoArtifact):
+        try:
+            cache_entry_dir = os.path.join(self.model_evaluation_config.cache_dir, cache_key)
+            if os.path.exists(cache_entry_dir):
+                return cache_entry_dir
+
+            temp_entry_dir = f"{cache_entry_dir}.tmp{os.getpid()}"
+            write_yaml_file(file_path=os.path.join(temp_entry_dir, MODEL_EVALUATION_CACHE_METRICS_FILE_NAME), data={
+                MODEL_EVALUATION_TRAIN_ACCURACY_KEY: float(metric_info.train_accuracy),
+                MODEL_EVALUATION_TEST_ACCURACY_KEY: float(metric_info.test_accuracy),
+                MODEL_EVALUATION_TRAIN_F1_KEY: float(metric_info.train_f1),
+                MODEL_EVALUATION_TEST_F1_KEY: float(metric_info.test_f1),
+            })
+            try:
+                os.rename(temp_entry_dir, cache_entry_dir)
+            except OSError:
+                #other run saved same entry first
+                shutil.rmtree(temp_entry_dir, ignore_errors=True)
+            logging.info(f"Best model metrics saved in cache: [{cache_entry_dir}]")
+            return cache_entry_dir
         except Exception as e:
             raise CustomException(e, sys) from e
 
@@ -95,6 +163,22 @@ class ModelEvaluation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+#when all the models have equal fitted preprocessing objects data is transformed once and shared by them
+#else every model transforms raw data itself
+    @staticmethod
+    def get_model_inputs(model_list: list, train_dataframe, test_dataframe) -> tuple:
+        try:
+            if len(model_list) > 1 and all(hasattr(model, "get_preprocessing_fingerprint") for model in model_list):
+                preprocessing_fingerprints = set(model.get_preprocessing_fingerprint() for model in model_list)
+                if len(preprocessing_fingerprints) == 1:
+                    logging.info("Models have same preprocessing object, transforming evaluation data once")
+                    #trained model transforms with its compiled preprocessing object when available
+                    return model_list[-1].transform(train_dataframe), model_list[-1].transform(test_dataframe), True
+                logging.info("Models have different preprocessing objects, every model transforms data itself")
+            return train_dataframe, test_dataframe, False
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
         try:
             #loading train and test we evaluate the model 
@@ -131,7 +215,8 @@ class ModelEvaluation:
             test_dataframe.drop(target_column_name, axis=1, inplace=True)
             logging.info(f"Dropping target column from the dataframe completed.")
 
-            model = self.get_best_model()
+            best_model_path = self.get_best_model_path()
+            model = None if best_model_path is None else load_object(file_path=best_model_path)
 
             #
             if model is None:
@@ -143,17 +228,31 @@ class ModelEvaluation:
                 logging.info(f"Model accepted. Model eval artifact {model_evaluation_artifact} created")
                 return model_evaluation_artifact
 
-            #list of all trained models
-            model_list = [model, trained_model_object]
+            #best model is predicted again only when it or the data changed, trained model is always predicted
+            cache_key = self.get_best_model_cache_key(best_model_path=best_model_path)
+            best_model_metric_info = self.load_best_model_metric_info(cache_key=cache_key, model=model)
+            model_list = [trained_model_object] if best_model_metric_info is not None else [model, trained_model_object]
+            X_train, X_test, is_transformed = self.get_model_inputs(model_list=model_list,
+                                                                    train_dataframe=train_dataframe,
+                                                                    test_dataframe=test_dataframe)
+            model_predictions = get_model_predictions(model_list=model_list, X_train=X_train, X_test=X_test,
+                                                      is_transformed=is_transformed)
+            if best_model_metric_info is None:
+                y_train_pred, y_test_pred = model_predictions.pop(0)
+                best_model_metric_info = get_metric_info(model=model, index_number=0,
+                                                         y_train=train_target_arr, y_train_pred=y_train_pred,
+                                                         y_test=test_target_arr, y_test_pred=y_test_pred)
+                self.save_best_model_metric_info(cache_key=cache_key, metric_info=best_model_metric_info)
+
+            y_train_pred, y_test_pred = model_predictions[0]
+            trained_model_metric_info = get_metric_info(model=trained_model_object, index_number=1,
+                                                        y_train=train_target_arr, y_train_pred=y_train_pred,
+                                                        y_test=test_target_arr, y_test_pred=y_test_pred)
 
             #artifact
-            metric_info_artifact = evaluate_classification_model(model_list=model_list,
-                                                               X_train=train_dataframe,
-                                                               y_train=train_target_arr,
-                                                               X_test=test_dataframe,
-                                                               y_test=test_target_arr,
-                                                               base_accuracy=self.model_trainer_artifact.model_accuracy,
-                                                               )
+            metric_info_artifact = get_best_metric_info(metric_info_artifacts=[best_model_metric_info,
+                                                                               trained_model_metric_info],
+                                                        base_accuracy=self.model_trainer_artifact.model_accuracy)
             logging.info(f"Model evaluation completed. model metric artifact: {metric_info_artifact}")
 
             #if metrics info are none , do not accept model, if we are not saving the metrics then on which basics we will accept the mdel
@@ -2,8 +2,8 @@ from visa.logger import logging
 from visa.exception import CustomException
 from visa.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact 
 from visa.entity.config_entity import ModelPusherConfig
+from visa.utils.utils import copy_object_file
 import os, sys
-import shutil
 
 
 
@@ -36,8 +36,8 @@ class ModelPusher:
             os.makedirs(export_dir, exist_ok=True)
 
             #src-taking evaluation file and dst-to push the model at this path
-            #copying the best model from evaluation file to saved model folder
-            shutil.copy(src=evaluated_model_file_path, dst=export_model_file_path)
+            #copying the best model from evaluation file to saved model folder, with its array file if it has one
+            copy_object_file(src=evaluated_model_file_path, dst=export_model_file_path)
 
             logging.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir:[{export_model_file_path}]")
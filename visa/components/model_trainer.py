@@ -1,12 +1,18 @@
 from visa.exception import CustomException
 import sys
+import numpy as np
+import pandas as pd
 from visa.logger import logging
 from typing import List
-from visa.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
+from visa.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, DataDriftArtifact
 from visa.entity.config_entity import ModelTrainerConfig
-from visa.utils.utils import load_numpy_array_data, save_object, load_object
+from visa.utils.utils import load_numpy_array_data, save_object, load_object, link_or_copy_file, get_object_hash
+from visa.utils.utils import get_cache_key
+from visa.entity.prediction_cache import PredictionCache, get_canonical_value
 from visa.entity.model_factory import MetricInfoArtifact, ModelFactory, GridSearchedBestModel
 from visa.entity.model_factory import evaluate_classification_model
+from visa.entity.cv_result_store import CVResultStore
+from visa.entity.shared_model import save_shared_model
 
 #load transfomered training and testing dataset
 #reading model config file
@@ -19,14 +25,134 @@ from visa.entity.model_factory import evaluate_classification_model
 
 #taking preprocessing data and trained model object
 class VisaApprovalPredictor:
-    def __init__(self, preprocessing_object, trained_model_object):
+    def __init__(self, preprocessing_object, trained_model_object, compiled_preprocessing_object=None):
         """
         TrainedModel constructor
         preprocessing_object: preprocessing_object
         trained_model_object: trained_model_object
+        compiled_preprocessing_object: numpy only copy of preprocessing_object, used for prediction when available
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.compiled_preprocessing_object = compiled_preprocessing_object
+        self.use_compiled_preprocessing = compiled_preprocessing_object is not None
+
+#transforming raw input with compiled object if selected, else with sklearn preprocessing object
+#getattr because models saved before compiled object was added do not have these attributes
+    def transform(self, X):
+        compiled_preprocessing_object = getattr(self, "compiled_preprocessing_object", None)
+        if compiled_preprocessing_object is not None and getattr(self, "use_compiled_preprocessing", False):
+            return compiled_preprocessing_object.transform(X)
+        return self.preprocessing_object.transform(X)
+
+#content hash of fitted preprocessing object, predictors with same hash give same transformed features
+    def get_preprocessing_fingerprint(self) -> str:
+        preprocessing_fingerprint = getattr(self, "preprocessing_fingerprint", None)
+        if preprocessing_fingerprint is None:
+            preprocessing_fingerprint = get_object_hash(self.preprocessing_object)
+            self.preprocessing_fingerprint = preprocessing_fingerprint
+        return preprocessing_fingerprint
+
+#prediction on features already transformed by an equal preprocessing object
+    def predict_transformed(self, transformed_feature):
+        return self.trained_model_object.predict(transformed_feature)
+
+    def predict_proba_transformed(self, transformed_feature):
+        return self.trained_model_object.predict_proba(transformed_feature)
+
+#records are transformed without a dataframe when compiled object is available
+    def transform_records(self, records: list):
+        input_columns = list(self.preprocessing_object.feature_names_in_)
+        compiled_preprocessing_object = getattr(self, "compiled_preprocessing_object", None)
+        if compiled_preprocessing_object is not None and getattr(self, "use_compiled_preprocessing", False):
+            return compiled_preprocessing_object.transform_records(records, input_columns=input_columns)
+        if len(records) > 0 and not isinstance(records[0], dict):
+            return self.preprocessing_object.transform(pd.DataFrame.from_records(records, columns=input_columns))
+        return self.preprocessing_object.transform(pd.DataFrame.from_records(records))
+
+#categories seen by the fitted encoders of every categorical input column, other values can not be encoded
+    def get_known_categories(self) -> dict:
+        known_categories = dict()
+        for _, transformer, columns in self.preprocessing_object.transformers_:
+            steps = transformer.steps if hasattr(transformer, "steps") else [(None, transformer)]
+            for _, step in steps:
+                if hasattr(step, "categories_"):
+                    for column, categories in zip(columns, step.categories_):
+                        known_categories[column] = set(categories.tolist())
+        return known_categories
+
+#optional cache of predictions and probabilities, it is not saved with the model
+    def set_prediction_cache(self, prediction_cache: PredictionCache):
+        self.prediction_cache = prediction_cache
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("prediction_cache", None)
+        state.pop("model_fingerprint", None)
+        return state
+
+#content hash of preprocessing and trained model, part of every prediction cache key
+    def get_model_fingerprint(self) -> str:
+        model_fingerprint = getattr(self, "model_fingerprint", None)
+        if model_fingerprint is None:
+            model_fingerprint = get_cache_key(self.get_preprocessing_fingerprint(),
+                                              get_object_hash(self.trained_model_object))
+            self.model_fingerprint = model_fingerprint
+        return model_fingerprint
+
+    def get_prediction_cache_keys(self, records: list) -> list:
+        input_columns = list(self.preprocessing_object.feature_names_in_)
+        model_fingerprint = self.get_model_fingerprint()
+        if len(records) > 0 and not isinstance(records[0], dict):
+            return [(model_fingerprint, tuple(get_canonical_value(value) for value in record)) for record in records]
+        return [(model_fingerprint, tuple(get_canonical_value(record[column]) for column in input_columns))
+                for record in records]
+
+    def score_records(self, records: list) -> tuple:
+        """
+        Returns predictions and probabilities of the records, features are transformed once for both
+        with prediction cache only records which are not in cache are transformed and predicted
+        """
+        prediction_cache = getattr(self, "prediction_cache", None)
+        if prediction_cache is None:
+            transformed_feature = self.transform_records(records)
+            return self.predict_transformed(transformed_feature), self.predict_proba_transformed(transformed_feature)
+
+        cache_keys = self.get_prediction_cache_keys(records)
+        scores = [prediction_cache.get(cache_key) for cache_key in cache_keys]
+        missing_indexes = [index for index, score in enumerate(scores) if score is None]
+        if len(missing_indexes) > 0:
+            transformed_feature = self.transform_records([records[index] for index in missing_indexes])
+            predictions = self.predict_transformed(transformed_feature)
+            probabilities = self.predict_proba_transformed(transformed_feature)
+            for position, index in enumerate(missing_indexes):
+                scores[index] = (predictions[position], probabilities[position])
+                prediction_cache.put(cache_keys[index], scores[index])
+        return np.array([prediction for prediction, _ in scores]), np.vstack([probability for _, probability in scores])
+
+    def predict_records(self, records: list):
+        """
+        records: list of dict of feature column and value, or list of lists of values in schema column order
+        return: same predictions as predict(pd.DataFrame(records))
+        """
+        if getattr(self, "prediction_cache", None) is not None:
+            return self.score_records(records)[0]
+        return self.trained_model_object.predict(self.transform_records(records))
+
+    def predict_proba_records(self, records: list):
+        if getattr(self, "prediction_cache", None) is not None:
+            return self.score_records(records)[1]
+        return self.trained_model_object.predict_proba(self.transform_records(records))
+
+    def predict_one(self, record):
+        """
+        record: dict of feature column and value, or list of values in schema column order
+        return: prediction of the record
+        """
+        return self.predict_records([record])[0]
+
+    def predict_proba_one(self, record):
+        return self.predict_proba_records([record])[0]
 
 #part of feature columns
     def predict(self, X):
@@ -35,7 +161,7 @@ class VisaApprovalPredictor:
         which guarantees that the inputs are in the same format as the training data
         At last it performs prediction on transformed features
         """
-        transformed_feature = self.preprocessing_object.transform(X)
+        transformed_feature = self.transform(X)
         return self.trained_model_object.predict(transformed_feature)
     
 #part of target column
@@ -44,8 +170,12 @@ class VisaApprovalPredictor:
         function accepts raw inputs and then transformed raw input using preprocessing_object
         which guarantees that the inputs are in the same format as the training data
         At last it performs Probaility prediction on transformed features
+        with prediction cache rows already scored are read from cache
         """
-        transformed_feature = self.preprocessing_object.transform(X)
+        if getattr(self, "prediction_cache", None) is not None:
+            input_columns = list(self.preprocessing_object.feature_names_in_)
+            return self.predict_proba_records(list(X[input_columns].itertuples(index=False, name=None)))
+        transformed_feature = self.transform(X)
         return self.trained_model_object.predict_proba(transformed_feature)
     
 
@@ -61,28 +191,37 @@ class VisaApprovalPredictor:
 class ModelTrainer:
 
     def __init__(self, model_trainer_config: ModelTrainerConfig,
-                 data_transformation_artifact: DataTransformationArtifact):
+                 data_transformation_artifact: DataTransformationArtifact,
+                 data_drift_artifact: DataDriftArtifact = None):
         try:
             logging.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.data_drift_artifact = data_drift_artifact
         except Exception as e:
             raise CustomException(e, sys) from e
 
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         try:
+            #arrays are memory mapped, grid search workers share one page cached copy instead of private copies
             logging.info(f"Loading transformed training dataset")
             transformed_train_file_path = self.data_transformation_artifact.transformed_train_file_path
-            train_array = load_numpy_array_data(file_path=transformed_train_file_path)
+            x_train = load_numpy_array_data(file_path=transformed_train_file_path, mmap_mode="r")
+            y_train = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_target_file_path)
 
             logging.info(f"Loading transformed testing dataset")
-            transformed_test_file_path = self.data_transformation_artifact.transformed_test_file_path
-            test_array = load_numpy_array_data(file_path=transformed_test_file_path)
+            x_test = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path,
+                                           mmap_mode="r")
+            y_test = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_target_file_path)
 
-            #
-            logging.info(f"Splitting training and testing input and target feature")
-            x_train, y_train, x_test, y_test = train_array[:, :-1], train_array[:, -1], test_array[:, :-1], test_array[
-                                                                                                            :, -1]
+            #models are fitted on rebalanced training data, train metrics are computed on the real training rows
+            resampled_train_file_path = self.data_transformation_artifact.resampled_train_file_path
+            if resampled_train_file_path != transformed_train_file_path:
+                logging.info(f"Loading rebalanced training dataset")
+                x_fit = load_numpy_array_data(file_path=resampled_train_file_path, mmap_mode="r")
+                y_fit = load_numpy_array_data(file_path=self.data_transformation_artifact.resampled_train_target_file_path)
+            else:
+                x_fit, y_fit = x_train, y_train
 
             logging.info(f"Extracting model config file path")
             model_config_file_path = self.model_trainer_config.model_config_file_path
@@ -91,7 +230,11 @@ class ModelTrainer:
             #whatever hings we have under model config we are calling under model factory to train the model
             # calling the params that are defined under model factory 
             logging.info(f"Initializing model factory class using above model config file: {model_config_file_path}")
-            model_factory = ModelFactory(model_config_path=model_config_file_path)
+            cv_result_store = CVResultStore(store_dir=self.model_trainer_config.cv_result_cache_dir,
+                                            max_size_mb=self.model_trainer_config.cv_result_cache_max_size_mb)
+            model_factory = ModelFactory(model_config_path=model_config_file_path,
+                                         class_weight=self.model_trainer_config.class_weight,
+                                         cv_result_store=cv_result_store)
 
             base_accuracy = self.model_trainer_config.base_accuracy
             logging.info(f"Expected accuracy: {base_accuracy}")
@@ -101,7 +244,7 @@ class ModelTrainer:
 
             #getting best model based on accuracy
             logging.info(f"Initiating operation model selection")
-            best_model = model_factory.get_best_model(X=x_train, y=y_train, base_accuracy=base_accuracy)
+            best_model = model_factory.get_best_model(X=x_fit, y=y_fit, base_accuracy=base_accuracy)
 
             logging.info(f"Best model found on training dataset: {best_model}")
 
@@ -123,10 +266,27 @@ class ModelTrainer:
             model_object = metric_info.model_object
 
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
+            compiled_preprocessing_obj = None
+            compiled_preprocessing_obj_file_path = self.data_transformation_artifact.compiled_preprocessed_object_file_path
+            if compiled_preprocessing_obj_file_path is not None:
+                compiled_preprocessing_obj = load_object(file_path=compiled_preprocessing_obj_file_path)
             us_visa_model = VisaApprovalPredictor(preprocessing_object=preprocessing_obj,
-                                                      trained_model_object=model_object)
+                                                      trained_model_object=model_object,
+                                                      compiled_preprocessing_object=compiled_preprocessing_obj)
             logging.info(f"Saving model at path: {trained_model_file_path}")
-            save_object(file_path=trained_model_file_path, obj=us_visa_model)
+            if self.model_trainer_config.save_shared_arrays:
+                #prediction workers memory map the arrays, one copy of the model is shared by all of them
+                save_shared_model(file_path=trained_model_file_path, obj=us_visa_model,
+                                  min_array_bytes=int(self.model_trainer_config.shared_array_min_size_kb * 1024))
+            else:
+                save_object(file_path=trained_model_file_path, obj=us_visa_model)
+
+            #keeping sketch of training data with the model, drift of later runs is checked against it
+            if self.data_drift_artifact is not None and self.data_drift_artifact.reference_sketch_file_path is not None:
+                reference_sketch_file_path = self.model_trainer_config.reference_sketch_file_path
+                link_or_copy_file(src=self.data_drift_artifact.reference_sketch_file_path,
+                                  dst=reference_sketch_file_path)
+                logging.info(f"Reference sketch saved at: [{reference_sketch_file_path}]")
 
             model_trainer_artifact = ModelTrainerArtifact(is_trained=True, message="Model Trained successfully",
                                                           trained_model_file_path=trained_model_file_path,
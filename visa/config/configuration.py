@@ -64,12 +64,34 @@ class Configuartion:
                 data_ingestion_info[DATA_INGESTION_TEST_DIR_KEY]
             )
 
+            #cache dir is shared by all the runs so it is not under the time stamp folder
+            cache_dir = os.path.join(
+                artifact_dir,
+                DATA_INGESTION_ARTIFACT_DIR,
+                data_ingestion_info[DATA_INGESTION_CACHE_DIR_KEY]
+            )
+
+            #schema file is part of the cache key, if schema changes we have to split the data again
+            data_validation_info = self.config_info[DATA_VALIDATION_CONFIG_KEY]
+            schema_file_path = os.path.join(ROOT_DIR,
+            data_validation_info[DATA_VALIDATION_SCHEMA_DIR_KEY],
+            data_validation_info[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
+            )
+
             #calling main data_ingestion config to call all above functions
             data_ingestion_config=DataIngestionConfig(
                 dataset_download_url=dataset_download_url,
-                raw_data_dir=raw_data_dir, 
-                ingested_train_dir=ingested_train_dir, 
-                ingested_test_dir=ingested_test_dir
+                raw_data_dir=raw_data_dir,
+                ingested_train_dir=ingested_train_dir,
+                ingested_test_dir=ingested_test_dir,
+                cache_dir=cache_dir,
+                test_size=data_ingestion_info[DATA_INGESTION_TEST_SIZE_KEY],
+                random_state=data_ingestion_info[DATA_INGESTION_RANDOM_STATE_KEY],
+                chunk_size=data_ingestion_info[DATA_INGESTION_CHUNK_SIZE_KEY],
+                raw_data_file_pattern=data_ingestion_info[DATA_INGESTION_RAW_DATA_FILE_PATTERN_KEY],
+                num_workers=data_ingestion_info[DATA_INGESTION_NUM_WORKERS_KEY],
+                ingested_file_format=data_ingestion_info[DATA_INGESTION_FILE_FORMAT_KEY],
+                schema_file_path=schema_file_path
             )
             logging.info(f"Data Ingestion config: {data_ingestion_config}")
             
@@ -100,14 +122,62 @@ class Configuartion:
             data_validation_config[DATA_VALIDATION_SCHEMA_FILE_NAME_KEY]
             )
 
+            #report with per column statistics, later stages read it instead of computing again
+            report_file_path = os.path.join(data_validation_artifact_dir,
+            data_validation_config[DATA_VALIDATION_REPORT_FILE_NAME_KEY]
+            )
+
             data_validation_config = DataValidationConfig(
-                schema_file_path=schema_file_path
+                schema_file_path=schema_file_path,
+                report_file_path=report_file_path,
+                num_workers=data_validation_config[DATA_VALIDATION_NUM_WORKERS_KEY]
             )
             return data_validation_config
         except Exception as e:
             raise CustomException(e,sys) from e
 
 
+    def get_data_drift_config(self) -> DataDriftConfig:
+        try:
+            artifact_dir = self.training_pipeline_config.artifact_dir
+
+            data_drift_artifact_dir=os.path.join(
+                artifact_dir,
+                DATA_DRIFT_ARTIFACT_DIR,
+                self.time_stamp
+            )
+
+            data_drift_config_info = self.config_info[DATA_DRIFT_CONFIG_KEY]
+
+            #psi and ks of every column against the reference of current best model
+            drift_report_file_path = os.path.join(data_drift_artifact_dir,
+            data_drift_config_info[DATA_DRIFT_REPORT_FILE_NAME_KEY]
+            )
+
+            #sketch of the new training data, model trainer saves it next to the trained model
+            reference_sketch_file_path = os.path.join(data_drift_artifact_dir,
+            data_drift_config_info[DATA_DRIFT_REFERENCE_SKETCH_FILE_NAME_KEY]
+            )
+
+            #best model path is read from evaluation file, its reference sketch is in the same folder
+            model_evaluation_file_path = self.get_model_evaluation_config().model_evaluation_file_path
+
+            data_drift_config = DataDriftConfig(
+                drift_report_file_path=drift_report_file_path,
+                reference_sketch_file_path=reference_sketch_file_path,
+                reference_sketch_file_name=data_drift_config_info[DATA_DRIFT_REFERENCE_SKETCH_FILE_NAME_KEY],
+                model_evaluation_file_path=model_evaluation_file_path,
+                num_bins=data_drift_config_info[DATA_DRIFT_NUM_BINS_KEY],
+                psi_threshold=data_drift_config_info[DATA_DRIFT_PSI_THRESHOLD_KEY],
+                ks_threshold=data_drift_config_info[DATA_DRIFT_KS_THRESHOLD_KEY],
+                fail_on_drift=data_drift_config_info[DATA_DRIFT_FAIL_ON_DRIFT_KEY]
+            )
+            logging.info(f"Data drift config: {data_drift_config}")
+            return data_drift_config
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+
     def get_data_transformation_config(self) -> DataTransformationConfig:
         try:
             artifact_dir = self.training_pipeline_config.artifact_dir
@@ -126,7 +196,13 @@ class Configuartion:
                 data_transformation_config_info[DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY]
             )
 
-            
+
+            compiled_preprocessed_object_file_path = os.path.join(
+                data_transformation_artifact_dir,
+                data_transformation_config_info[DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY],
+                data_transformation_config_info[DATA_TRANSFORMATION_COMPILED_PREPROCESSED_FILE_NAME_KEY]
+            )
+
             transformed_train_dir=os.path.join(
             data_transformation_artifact_dir,
             data_transformation_config_info[DATA_TRANSFORMATION_DIR_NAME_KEY],
@@ -140,12 +216,31 @@ class Configuartion:
             data_transformation_config_info[DATA_TRANSFORMATION_TEST_DIR_NAME_KEY]
 
             )
+
+            #cache dir is shared by all the runs so it is not under the time stamp folder
+            cache_dir = os.path.join(
+                artifact_dir,
+                DATA_TRANSFORMATION_ARTIFACT_DIR,
+                data_transformation_config_info[DATA_TRANSFORMATION_CACHE_DIR_KEY]
+            )
+
+            #how training data is rebalanced, checked here so a typo fails before any work is done
+            rebalancing_info = data_transformation_config_info[DATA_TRANSFORMATION_REBALANCING_KEY]
+            if rebalancing_info[REBALANCING_STRATEGY_KEY] not in REBALANCING_STRATEGIES:
+                raise Exception(f"Rebalancing strategy [{rebalancing_info[REBALANCING_STRATEGY_KEY]}] "
+                                f"is not one of {REBALANCING_STRATEGIES}")
             
             #calling main config to call all above functions
             data_transformation_config=DataTransformationConfig(
                 preprocessed_object_file_path=preprocessed_object_file_path,
                 transformed_train_dir=transformed_train_dir,
-                transformed_test_dir=transformed_test_dir
+                transformed_test_dir=transformed_test_dir,
+                cache_dir=cache_dir,
+                rebalancing_strategy=rebalancing_info[REBALANCING_STRATEGY_KEY],
+                rebalancing_sampling_strategy=rebalancing_info[REBALANCING_SAMPLING_STRATEGY_KEY],
+                rebalancing_random_state=rebalancing_info[REBALANCING_RANDOM_STATE_KEY],
+                transformed_array_dtype=data_transformation_config_info[DATA_TRANSFORMATION_ARRAY_DTYPE_KEY],
+                compiled_preprocessed_object_file_path=compiled_preprocessed_object_file_path
             )
 
             logging.info(f"Data transformation config: {data_transformation_config}")
@@ -178,11 +273,33 @@ class Configuartion:
 
             base_accuracy = model_trainer_config_info[MODEL_TRAINER_BASE_ACCURACY_KEY]
 
+            #reference sketch of training data is kept next to the model for drift check of later runs
+            reference_sketch_file_path = os.path.join(os.path.dirname(trained_model_file_path),
+            self.config_info[DATA_DRIFT_CONFIG_KEY][DATA_DRIFT_REFERENCE_SKETCH_FILE_NAME_KEY]
+            )
+
+            #models are given balanced class weight when training data is not resampled for class balance
+            rebalancing_strategy = self.config_info[DATA_TRANSFORMATION_CONFIG_KEY][DATA_TRANSFORMATION_REBALANCING_KEY][REBALANCING_STRATEGY_KEY]
+            class_weight = BALANCED_CLASS_WEIGHT if rebalancing_strategy == REBALANCING_STRATEGY_CLASS_WEIGHT else None
+
+            #cv result cache is shared by all the runs so it is not under the time stamp folder
+            cv_result_cache_dir = os.path.join(
+                artifact_dir,
+                MODEL_TRAINER_ARTIFACT_DIR,
+                model_trainer_config_info[MODEL_TRAINER_CV_RESULT_CACHE_DIR_KEY]
+            )
+
             #calling final model trainer config
             model_trainer_config = ModelTrainerConfig(
                 trained_model_file_path=trained_model_file_path,
                 base_accuracy=base_accuracy,
-                model_config_file_path=model_config_file_path
+                model_config_file_path=model_config_file_path,
+                reference_sketch_file_path=reference_sketch_file_path,
+                class_weight=class_weight,
+                cv_result_cache_dir=cv_result_cache_dir,
+                cv_result_cache_max_size_mb=model_trainer_config_info[MODEL_TRAINER_CV_RESULT_CACHE_MAX_SIZE_MB_KEY],
+                save_shared_arrays=model_trainer_config_info[MODEL_TRAINER_SAVE_SHARED_ARRAYS_KEY],
+                shared_array_min_size_kb=model_trainer_config_info[MODEL_TRAINER_SHARED_ARRAY_MIN_SIZE_KB_KEY]
             )
             logging.info(f"Model trainer config: {model_trainer_config}")
             return model_trainer_config
@@ -207,6 +324,43 @@ class Configuartion:
         except Exception as e:
             raise CustomException(e,sys) from e
         
+    def get_batch_prediction_config(self) -> BatchPredictionConfig:
+        try:
+            batch_prediction_config_info = self.config_info[BATCH_PREDICTION_CONFIG_KEY]
+            #latest model is picked from the folder where model pusher saves the models
+            model_export_dir = os.path.join(ROOT_DIR,
+                                            self.config_info[MODEL_PUSHER_CONFIG_KEY][MODEL_PUSHER_MODEL_EXPORT_DIR_KEY])
+
+            batch_prediction_config = BatchPredictionConfig(
+                model_export_dir=model_export_dir,
+                model_file_name=self.config_info[MODEL_TRAINER_CONFIG_KEY][MODEL_TRAINER_TRAINED_MODEL_FILE_NAME_KEY],
+                schema_file_path=self.get_data_validation_config().schema_file_path,
+                chunk_size=batch_prediction_config_info[BATCH_PREDICTION_CHUNK_SIZE_KEY],
+                num_workers=batch_prediction_config_info[BATCH_PREDICTION_NUM_WORKERS_KEY]
+            )
+            logging.info(f"Batch prediction config: {batch_prediction_config}")
+            return batch_prediction_config
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+    def get_prediction_service_config(self) -> PredictionServiceConfig:
+        try:
+            prediction_service_config_info = self.config_info[PREDICTION_SERVICE_CONFIG_KEY]
+            prediction_service_config = PredictionServiceConfig(
+                model_export_dir=os.path.join(ROOT_DIR,
+                                              self.config_info[MODEL_PUSHER_CONFIG_KEY][MODEL_PUSHER_MODEL_EXPORT_DIR_KEY]),
+                model_file_name=self.config_info[MODEL_TRAINER_CONFIG_KEY][MODEL_TRAINER_TRAINED_MODEL_FILE_NAME_KEY],
+                max_batch_size=prediction_service_config_info[PREDICTION_SERVICE_MAX_BATCH_SIZE_KEY],
+                max_wait_ms=prediction_service_config_info[PREDICTION_SERVICE_MAX_WAIT_MS_KEY],
+                cache_max_size=prediction_service_config_info[PREDICTION_SERVICE_CACHE_MAX_SIZE_KEY],
+                cache_ttl_seconds=prediction_service_config_info[PREDICTION_SERVICE_CACHE_TTL_SECONDS_KEY],
+                model_check_interval_seconds=prediction_service_config_info[PREDICTION_SERVICE_MODEL_CHECK_INTERVAL_SECONDS_KEY]
+            )
+            logging.info(f"Prediction service config: {prediction_service_config}")
+            return prediction_service_config
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
     def get_model_evaluation_config(self) ->ModelEvaluationConfig:
         try:
             #getting all the var as config key 
@@ -217,8 +371,11 @@ class Configuartion:
             
             model_evaluation_file_path = os.path.join(artifact_dir,
                                                     model_evaluation_config[MODEL_EVALUATION_FILE_NAME_KEY])
+            #cache dir is shared by all the runs
+            cache_dir = os.path.join(artifact_dir, model_evaluation_config[MODEL_EVALUATION_CACHE_DIR_KEY])
             response = ModelEvaluationConfig(model_evaluation_file_path=model_evaluation_file_path,
-                                            time_stamp=self.time_stamp)
+                                            time_stamp=self.time_stamp,
+                                            cache_dir=cache_dir)
             
             
             logging.info(f"Model Evaluation Config: {response}.")
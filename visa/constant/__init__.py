@@ -25,6 +25,27 @@ DATA_INGESTION_RAW_DATA_DIR_KEY = "raw_data_dir"
 DATA_INGESTION_INGESTED_DIR_NAME_KEY = "ingested_dir"
 DATA_INGESTION_TRAIN_DIR_KEY = "ingested_train_dir"
 DATA_INGESTION_TEST_DIR_KEY = "ingested_test_dir"
+DATA_INGESTION_CACHE_DIR_KEY = "cache_dir"
+DATA_INGESTION_TEST_SIZE_KEY = "test_size"
+DATA_INGESTION_RANDOM_STATE_KEY = "random_state"
+DATA_INGESTION_CHUNK_SIZE_KEY = "chunk_size"
+DATA_INGESTION_RAW_DATA_FILE_PATTERN_KEY = "raw_data_file_pattern"
+DATA_INGESTION_NUM_WORKERS_KEY = "num_workers"
+DATA_INGESTION_PARTS_DIR = "parts"
+DATA_INGESTION_FILE_FORMAT_KEY = "ingested_file_format"
+INGESTED_FILE_FORMAT_CSV = "csv"
+INGESTED_FILE_FORMAT_NPZ = "npz"
+COLUMNAR_FILE_EXTENSION = ".npz"
+COLUMNAR_COLUMNS_KEY = "__columns__"
+DATA_INGESTION_CACHE_TRAIN_DIR = "train"
+DATA_INGESTION_CACHE_TEST_DIR = "test"
+DATA_INGESTION_CACHE_INFO_FILE_NAME = "cache_info.yaml"
+#chunked split puts rows in 2^bits hash bins per case status, test share of every class may differ from test_size
+#by the rows of one bin and the split fails if it differs more than the tolerance
+DATA_INGESTION_HASH_BIN_BITS = 16
+DATA_INGESTION_CLASS_RATIO_TOLERANCE = 0.01
+#change this when rows are assigned to train and test in another way so old cached splits are not reused
+DATA_INGESTION_SPLIT_VERSION = 2
 
 # Training pipeline related variable
 TRAINING_PIPELINE_CONFIG_KEY = "training_pipeline_config"
@@ -44,6 +65,50 @@ DATA_VALIDATION_ARTIFACT_DIR="data_validation"
 DATA_VALIDATION_CONFIG_KEY = "data_validation_config"
 DATA_VALIDATION_SCHEMA_FILE_NAME_KEY = "schema_file_name"
 DATA_VALIDATION_SCHEMA_DIR_KEY = "schema_dir"
+DATA_VALIDATION_REPORT_FILE_NAME_KEY = "report_file_name"
+DATA_VALIDATION_NUM_WORKERS_KEY = "num_workers"
+
+# Data profile (validation report) related variables
+VALIDATION_REPORT_TRAIN_KEY = "train"
+VALIDATION_REPORT_TEST_KEY = "test"
+VALIDATION_REPORT_FILE_PATH_KEY = "file_path"
+VALIDATION_REPORT_IS_VALIDATED_KEY = "is_validated"
+VALIDATION_REPORT_NUMBER_OF_ROWS_KEY = "number_of_rows"
+VALIDATION_REPORT_PROFILE_KEY = "profile"
+DATA_PROFILE_DTYPE_KEY = "dtype"
+DATA_PROFILE_NULL_COUNT_KEY = "null_count"
+DATA_PROFILE_CARDINALITY_KEY = "cardinality"
+DATA_PROFILE_MIN_KEY = "min"
+DATA_PROFILE_MAX_KEY = "max"
+DATA_PROFILE_MEAN_KEY = "mean"
+DATA_PROFILE_QUANTILES_KEY = "quantiles"
+DATA_PROFILE_FREQUENCIES_KEY = "frequencies"
+DATA_PROFILE_QUANTILES = [0.0, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0]
+
+# Data Drift related variables
+DATA_DRIFT_ARTIFACT_DIR = "data_drift"
+DATA_DRIFT_CONFIG_KEY = "data_drift_config"
+DATA_DRIFT_REPORT_FILE_NAME_KEY = "drift_report_file_name"
+DATA_DRIFT_REFERENCE_SKETCH_FILE_NAME_KEY = "reference_sketch_file_name"
+DATA_DRIFT_NUM_BINS_KEY = "num_bins"
+DATA_DRIFT_PSI_THRESHOLD_KEY = "psi_threshold"
+DATA_DRIFT_KS_THRESHOLD_KEY = "ks_threshold"
+DATA_DRIFT_FAIL_ON_DRIFT_KEY = "fail_on_drift"
+
+#keys of reference sketch and drift report
+DRIFT_SKETCH_NUMBER_OF_ROWS_KEY = "number_of_rows"
+DRIFT_SKETCH_COLUMNS_KEY = "columns"
+DRIFT_SKETCH_TYPE_KEY = "type"
+DRIFT_SKETCH_BIN_EDGES_KEY = "bin_edges"
+DRIFT_SKETCH_FREQUENCIES_KEY = "frequencies"
+DRIFT_SKETCH_NUMERICAL_TYPE = "numerical"
+DRIFT_SKETCH_CATEGORICAL_TYPE = "categorical"
+DRIFT_REPORT_REFERENCE_SKETCH_KEY = "reference_sketch_file_path"
+DRIFT_REPORT_IS_DRIFT_DETECTED_KEY = "is_drift_detected"
+DRIFT_REPORT_DRIFTED_COLUMNS_KEY = "drifted_columns"
+DRIFT_REPORT_STATISTICS_KEY = "statistics"
+DRIFT_REPORT_PSI_KEY = "psi"
+DRIFT_REPORT_KS_KEY = "ks"
 
 
 # Data Transformation related variables
@@ -54,10 +119,49 @@ DATA_TRANSFORMATION_TRAIN_DIR_NAME_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_TEST_DIR_NAME_KEY = "transformed_test_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_FILE_NAME_KEY = "preprocessed_object_file_name"
+DATA_TRANSFORMATION_COMPILED_PREPROCESSED_FILE_NAME_KEY = "compiled_preprocessed_object_file_name"
+DATA_TRANSFORMATION_CACHE_DIR_KEY = "cache_dir"
+DATA_TRANSFORMATION_CACHE_TRAIN_DIR = "train"
+DATA_TRANSFORMATION_CACHE_TEST_DIR = "test"
+DATA_TRANSFORMATION_CACHE_INFO_FILE_NAME = "cache_info.yaml"
+#change this when transformation code changes so old fitted objects are not reused
+DATA_TRANSFORMATION_CACHE_VERSION = 3
+
+#class rebalancing of training data, test data is never resampled
+DATA_TRANSFORMATION_REBALANCING_KEY = "rebalancing"
+REBALANCING_STRATEGY_KEY = "strategy"
+REBALANCING_SAMPLING_STRATEGY_KEY = "sampling_strategy"
+REBALANCING_RANDOM_STATE_KEY = "random_state"
+REBALANCING_STRATEGY_SMOTEENN = "smoteenn"
+REBALANCING_STRATEGY_SMOTE = "smote"
+REBALANCING_STRATEGY_RANDOM_OVER = "random_over"
+REBALANCING_STRATEGY_RANDOM_UNDER = "random_under"
+REBALANCING_STRATEGY_CLASS_WEIGHT = "class_weight"
+REBALANCING_STRATEGY_NONE = "none"
+REBALANCING_STRATEGIES = [REBALANCING_STRATEGY_SMOTEENN, REBALANCING_STRATEGY_SMOTE, REBALANCING_STRATEGY_RANDOM_OVER,
+                          REBALANCING_STRATEGY_RANDOM_UNDER, REBALANCING_STRATEGY_CLASS_WEIGHT, REBALANCING_STRATEGY_NONE]
+#class_weight given to the models when rebalancing strategy is class_weight
+BALANCED_CLASS_WEIGHT = "balanced"
+#rebalanced training array is saved next to train array with this suffix
+DATA_TRANSFORMATION_RESAMPLED_FILE_SUFFIX = "_resampled"
+#features and target are saved in separate npy files, features in declared dtype
+DATA_TRANSFORMATION_ARRAY_DTYPE_KEY = "transformed_array_dtype"
+DATA_TRANSFORMATION_FEATURES_FILE_SUFFIX = "_features"
+DATA_TRANSFORMATION_TARGET_FILE_SUFFIX = "_target"
+NUMPY_ARRAY_FILE_EXTENSION = ".npy"
 
 TARGET_COLUMN_KEY = "target_column"
+DATASET_SCHEMA_FILE_NAME_KEY = "FileName"
 DATASET_SCHEMA_COLUMNS_KEY = "ColumnNames"
 
+#dtype written in schema.yaml and the pandas dtype used to read that column
+#int columns are read as float64 so missing values reach validation and imputer as nan instead of failing the read
+SCHEMA_DTYPE_MAPPING = {
+    "category": "category",
+    "int": "float64",
+    "float": "float64",
+}
+
 NUMERICAL_COLUMN_KEY = "Numerical_columns"
 ONE_HOT_COLUMN_KEY= "Onehot_columns"
 ORDINAL_COLUMN_KEY ="Oridnal_columns"
@@ -73,11 +177,23 @@ MODEL_TRAINER_TRAINED_MODEL_FILE_NAME_KEY = "model_file_name"
 MODEL_TRAINER_BASE_ACCURACY_KEY = "base_accuracy"
 MODEL_TRAINER_MODEL_CONFIG_DIR_KEY = "model_config_dir"
 MODEL_TRAINER_MODEL_CONFIG_FILE_NAME_KEY = "model_config_file_name"
+MODEL_TRAINER_CV_RESULT_CACHE_DIR_KEY = "cv_result_cache_dir"
+MODEL_TRAINER_CV_RESULT_CACHE_MAX_SIZE_MB_KEY = "cv_result_cache_max_size_mb"
+MODEL_TRAINER_SAVE_SHARED_ARRAYS_KEY = "save_shared_arrays"
+MODEL_TRAINER_SHARED_ARRAY_MIN_SIZE_KB_KEY = "shared_array_min_size_kb"
 
 # Model Evaluatioin related variables
 MODEL_EVALUATION_CONFIG_KEY = "model_evaluation_config"
 MODEL_EVALUATION_FILE_NAME_KEY = "model_evaluation_file_name"
 MODEL_EVALUATION_ARTIFACT_DIR = "model_evaluation"
+MODEL_EVALUATION_CACHE_DIR_KEY = "cache_dir"
+MODEL_EVALUATION_CACHE_METRICS_FILE_NAME = "metrics.yaml"
+MODEL_EVALUATION_TRAIN_ACCURACY_KEY = "train_accuracy"
+MODEL_EVALUATION_TEST_ACCURACY_KEY = "test_accuracy"
+MODEL_EVALUATION_TRAIN_F1_KEY = "train_f1"
+MODEL_EVALUATION_TEST_F1_KEY = "test_f1"
+#change this when evaluation code changes so old predictions are not reused
+MODEL_EVALUATION_CACHE_VERSION = 1
 
 BEST_MODEL_KEY = "best_model"
 HISTORY_KEY = "history"
@@ -85,4 +201,23 @@ MODEL_PATH_KEY = "model_path"
 
 # Model Pusher config key
 MODEL_PUSHER_CONFIG_KEY = "model_pusher_config"
-MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
\ No newline at end of file
+MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
+
+# Batch Prediction related variables
+BATCH_PREDICTION_CONFIG_KEY = "batch_prediction_config"
+BATCH_PREDICTION_CHUNK_SIZE_KEY = "chunk_size"
+BATCH_PREDICTION_NUM_WORKERS_KEY = "num_workers"
+PREDICTION_COLUMN = "prediction"
+PREDICTION_PROBABILITY_COLUMN = "probability"
+
+# Prediction Service related variables
+PREDICTION_SERVICE_CONFIG_KEY = "prediction_service_config"
+PREDICTION_SERVICE_MAX_BATCH_SIZE_KEY = "max_batch_size"
+PREDICTION_SERVICE_MAX_WAIT_MS_KEY = "max_wait_ms"
+PREDICTION_SERVICE_CACHE_MAX_SIZE_KEY = "cache_max_size"
+PREDICTION_SERVICE_CACHE_TTL_SECONDS_KEY = "cache_ttl_seconds"
+PREDICTION_SERVICE_MODEL_CHECK_INTERVAL_SECONDS_KEY = "model_check_interval_seconds"
+
+# Shared model arrays related variables
+SHARED_ARRAY_FILE_EXTENSION = ".arrays"
+SHARED_ARRAY_ALIGNMENT = 64
\ No newline at end of file
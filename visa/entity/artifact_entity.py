@@ -6,12 +6,18 @@ DataIngestionArtifact = namedtuple("DataIngestionArtifact",
 
 
 DataValidationArtifact = namedtuple("DataValidationArtifact",
-["schema_file_path","is_validated","message"])
+["schema_file_path","is_validated","message","report_file_path"])
+
+
+DataDriftArtifact = namedtuple("DataDriftArtifact",
+["is_drift_detected", "drift_report_file_path", "reference_sketch_file_path", "message"])
 
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact",
  ["is_transformed", "message", "transformed_train_file_path","transformed_test_file_path",
-     "preprocessed_object_file_path"])
+     "preprocessed_object_file_path", "resampled_train_file_path", "transformed_train_target_file_path",
+     "transformed_test_target_file_path", "resampled_train_target_file_path",
+     "compiled_preprocessed_object_file_path"])
 
 ModelTrainerArtifact = namedtuple("ModelTrainerArtifact", ["is_trained", "message", "trained_model_file_path",
                                                            "train_f1", "test_f1", "train_accuracy", "test_accuracy",
@@ -0,0 +1,299 @@
+#fitted preprocessing object (ColumnTransformer) compiled into plain numpy operations for fast prediction.
+#encoders become sorted category arrays with the value of every category (scaling already applied),
+#scalers become mean and scale vectors and power transformer keeps its fitted yeo-johnson lambdas.
+#operations and their order are same as sklearn, so the output is exactly same and not only close.
+from visa.exception import CustomException
+import numpy as np
+import sys
+from scipy import sparse
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler, OrdinalEncoder, OneHotEncoder, PowerTransformer
+from visa.entity.custom_transformers import OutlierCapper
+
+#operations of a compiled column block
+CLIP_OPERATION = "clip"
+FILL_OPERATION = "fill"
+SUBTRACT_OPERATION = "subtract"
+DIVIDE_OPERATION = "divide"
+YEO_JOHNSON_OPERATION = "yeo_johnson"
+ORDINAL_OPERATION = "ordinal"
+ONE_HOT_OPERATION = "one_hot"
+
+#values used to find which yeo-johnson formula installed sklearn uses
+YEO_JOHNSON_PROBE_VALUES = np.array([-25.0, -2.5, -1.0, -0.3, 0.0, 0.3, 1.0, 2.5, 25.0])
+
+
+def yeo_johnson_power(x: np.ndarray, lmbda: float) -> np.ndarray:
+    #formula of sklearn < 1.5
+    out = np.zeros_like(x)
+    pos = x >= 0
+    if abs(lmbda) < np.spacing(1.0):
+        out[pos] = np.log1p(x[pos])
+    else:
+        out[pos] = (np.power(x[pos] + 1, lmbda) - 1) / lmbda
+    if abs(lmbda - 2) > np.spacing(1.0):
+        out[~pos] = -(np.power(-x[~pos] + 1, 2 - lmbda) - 1) / (2 - lmbda)
+    else:
+        out[~pos] = -np.log1p(-x[~pos])
+    return out
+
+
+def yeo_johnson_expm1(x: np.ndarray, lmbda: float) -> np.ndarray:
+    #numerically stable formula of newer sklearn
+    out = np.zeros_like(x)
+    pos = x >= 0
+    if abs(lmbda) < np.spacing(1.0):
+        out[pos] = np.log1p(x[pos])
+    else:
+        out[pos] = np.expm1(lmbda * np.log1p(x[pos])) / lmbda
+    if abs(lmbda - 2) > np.spacing(1.0):
+        out[~pos] = -np.expm1((2 - lmbda) * np.log1p(-x[~pos])) / (2 - lmbda)
+    else:
+        out[~pos] = -np.log1p(-x[~pos])
+    return out
+
+
+YEO_JOHNSON_FUNCTIONS = {
+    "power": yeo_johnson_power,
+    "expm1": yeo_johnson_expm1,
+}
+
+
+def is_missing(values: np.ndarray) -> np.ndarray:
+    #same check as SimpleImputer with missing_values=np.nan, nan is the only value not equal to itself
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    return values != values
+
+
+class CompiledPreprocessor:
+    """
+    Numpy only replacement of a fitted ColumnTransformer
+    preprocessing_object: fitted ColumnTransformer made of Pipelines of OutlierCapper, SimpleImputer,
+    StandardScaler, OrdinalEncoder, OneHotEncoder and PowerTransformer (yeo-johnson)
+    """
+
+    def __init__(self, preprocessing_object):
+        try:
+            self.blocks = []
+            self.number_of_features = 0
+            self.sparse_output = bool(getattr(preprocessing_object, "sparse_output_", False))
+            self.yeo_johnson_variant = None
+            #columns in the order preprocessing object was fitted on, records given as lists follow this order
+            self.input_columns = list(getattr(preprocessing_object, "feature_names_in_", []))
+            for name, transformer, columns in preprocessing_object.transformers_:
+                if transformer == "drop" or len(columns) == 0:
+                    continue
+                if transformer == "passthrough":
+                    raise Exception(f"Passthrough columns of [{name}] can not be compiled")
+                steps = transformer.steps if isinstance(transformer, Pipeline) else [(name, transformer)]
+                operations, width = self.compile_steps([step for _, step in steps], number_of_columns=len(columns))
+                self.blocks.append((list(columns), operations))
+                self.number_of_features += width
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_yeo_johnson_variant(self, power_transformer: PowerTransformer) -> str:
+        """
+        Returns name of the yeo-johnson formula which gives exactly same values as installed sklearn
+        """
+        if self.yeo_johnson_variant is None:
+            for variant, function in YEO_JOHNSON_FUNCTIONS.items():
+                if all(np.array_equal(function(YEO_JOHNSON_PROBE_VALUES, lmbda),
+                                      power_transformer._yeo_johnson_transform(YEO_JOHNSON_PROBE_VALUES.copy(), lmbda))
+                       for lmbda in list(power_transformer.lambdas_) + [0.0, 2.0]):
+                    self.yeo_johnson_variant = variant
+                    break
+            else:
+                raise Exception("Yeo-johnson formula of installed sklearn is not known")
+        return self.yeo_johnson_variant
+
+    def compile_steps(self, steps: list, number_of_columns: int):
+        """
+        Returns list of (operation, params) of a pipeline and number of output columns
+        scaler right after an encoder is merged in the encoded values of every category
+        """
+        operations = []
+        width = number_of_columns
+        for step in steps:
+            previous_operation = operations[-1][0] if len(operations) > 0 else None
+            if isinstance(step, OutlierCapper):
+                operations.append((CLIP_OPERATION, (step.lower_limits_, step.upper_limits_)))
+            elif isinstance(step, SimpleImputer):
+                if not (isinstance(step.missing_values, float) and np.isnan(step.missing_values)) or step.add_indicator:
+                    raise Exception(f"Only nan imputation can be compiled: {step}")
+                operations.append((FILL_OPERATION, step.statistics_))
+            elif isinstance(step, OrdinalEncoder):
+                if step.handle_unknown == "use_encoded_value":
+                    unknown_value = float(step.unknown_value)
+                else:
+                    unknown_value = None
+                tables = [np.arange(len(categories), dtype="float64") for categories in step.categories_]
+                operations.append((ORDINAL_OPERATION, (list(step.categories_), tables, unknown_value)))
+            elif isinstance(step, OneHotEncoder):
+                if step.drop_idx_ is not None or getattr(step, "_infrequent_enabled", False):
+                    raise Exception(f"One hot encoder with drop or infrequent categories can not be compiled: {step}")
+                tables = [np.ones(len(categories), dtype="float64") for categories in step.categories_]
+                operations.append((ONE_HOT_OPERATION, (list(step.categories_), tables, step.handle_unknown == "ignore")))
+                width = sum(len(categories) for categories in step.categories_)
+            elif isinstance(step, StandardScaler):
+                if previous_operation in [ORDINAL_OPERATION, ONE_HOT_OPERATION] and not step.with_mean:
+                    #encoded value of every category is scaled once here instead of on every prediction
+                    operation, (categories, tables, unknown) = operations.pop()
+                    scale = np.ones(width) if step.scale_ is None else step.scale_
+                    if operation == ORDINAL_OPERATION:
+                        #dense scaler divides by scale
+                        tables = [table / scale[index] for index, table in enumerate(tables)]
+                        if unknown is not None:
+                            raise Exception("Scaled unknown value of ordinal encoder can not be compiled")
+                    else:
+                        #one hot output is sparse and sparse scaler multiplies by 1 / scale
+                        inverse_scale = 1 / scale
+                        offsets = np.cumsum([0] + [len(table) for table in tables])
+                        tables = [table * inverse_scale[offsets[index]:offsets[index + 1]]
+                                  for index, table in enumerate(tables)]
+                    operations.append((operation, (categories, tables, unknown)))
+                else:
+                    if step.with_mean:
+                        operations.append((SUBTRACT_OPERATION, step.mean_))
+                    if step.with_std:
+                        operations.append((DIVIDE_OPERATION, step.scale_))
+            elif isinstance(step, PowerTransformer):
+                if step.method != "yeo-johnson":
+                    raise Exception(f"Only yeo-johnson power transformer can be compiled: {step}")
+                operations.append((YEO_JOHNSON_OPERATION, (np.asarray(step.lambdas_, dtype="float64"),
+                                                           self.get_yeo_johnson_variant(step))))
+                if step.standardize:
+                    operations.append((SUBTRACT_OPERATION, step._scaler.mean_))
+                    operations.append((DIVIDE_OPERATION, step._scaler.scale_))
+            else:
+                raise Exception(f"Step [{type(step).__name__}] can not be compiled")
+        return operations, width
+
+    @staticmethod
+    def encode(values: np.ndarray, categories: list, tables: list, unknown, one_hot: bool) -> np.ndarray:
+        """
+        categories of every column are sorted, so index of a value is found with searchsorted
+        and its encoded value is read from the table at that index
+        """
+        number_of_rows = values.shape[0]
+        width = sum(len(table) for table in tables) if one_hot else len(tables)
+        out = np.zeros((number_of_rows, width), dtype="float64")
+        offset = 0
+        for index, (column_categories, table) in enumerate(zip(categories, tables)):
+            column_values = values[:, index]
+            positions = np.searchsorted(column_categories, column_values)
+            positions = np.minimum(positions, len(column_categories) - 1)
+            is_known = column_categories[positions] == column_values
+            if not is_known.all() and (unknown is None or unknown is False):
+                raise ValueError(f"Found unknown categories {list(np.unique(column_values[~is_known]))} "
+                                 f"in column {index} during transform")
+            if one_hot:
+                rows = np.flatnonzero(is_known)
+                out[rows, offset + positions[rows]] = table[positions[rows]]
+                offset += len(table)
+            else:
+                out[:, index] = np.where(is_known, table[positions], unknown if unknown is not None else 0)
+        return out
+
+    def transform_block(self, values: np.ndarray, operations: list) -> np.ndarray:
+        for operation, params in operations:
+            if operation == CLIP_OPERATION:
+                values = np.clip(values.astype("float64"), params[0], params[1])
+            elif operation == FILL_OPERATION:
+                mask = is_missing(values)
+                if mask.any():
+                    values = values.copy()
+                    values[mask] = np.take(params, np.nonzero(mask)[1])
+            elif operation == SUBTRACT_OPERATION:
+                values = values.astype("float64") - params
+            elif operation == DIVIDE_OPERATION:
+                values = values.astype("float64") / params
+            elif operation == YEO_JOHNSON_OPERATION:
+                lambdas, variant = params
+                values = values.astype("float64")
+                function = YEO_JOHNSON_FUNCTIONS[variant]
+                with np.errstate(invalid="ignore"):
+                    for index, lmbda in enumerate(lambdas):
+                        values[:, index] = function(values[:, index], lmbda)
+            elif operation in [ORDINAL_OPERATION, ONE_HOT_OPERATION]:
+                categories, tables, unknown = params
+                values = CompiledPreprocessor.encode(values, categories=categories, tables=tables, unknown=unknown,
+                                                     one_hot=operation == ONE_HOT_OPERATION)
+        return values
+
+    def transform(self, X):
+        """
+        X: dataframe or dict of column name and values
+        return: np.ndarray same as preprocessing_object.transform(X)
+        """
+        try:
+            outputs = []
+            for columns, operations in self.blocks:
+                column_values = [np.asarray(X[column]) for column in columns]
+                if all(values.dtype.kind in "biuf" for values in column_values):
+                    block_values = np.column_stack(column_values).astype("float64")
+                else:
+                    block_values = np.column_stack([values.astype(object) for values in column_values])
+                outputs.append(self.transform_block(block_values, operations))
+            output = np.hstack(outputs) if len(outputs) > 1 else outputs[0]
+            if self.sparse_output:
+                return sparse.csr_matrix(output)
+            return output
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform_records(self, records: list, input_columns: list = None):
+        """
+        Same output as transform(pd.DataFrame(records)) without building a dataframe
+        records: list of dict of column name and value, or list of lists of values in input column order
+        input_columns: column order of list records, input columns of fitted object if not given
+        return: np.ndarray, every block writes its columns in one preallocated output array
+        """
+        try:
+            if len(records) > 0 and not isinstance(records[0], dict):
+                #objects compiled before input columns were saved do not have them
+                input_columns = input_columns if input_columns is not None else getattr(self, "input_columns", None)
+                if not input_columns:
+                    raise Exception("Input columns are needed to transform records given as lists")
+                records = [dict(zip(input_columns, record)) for record in records]
+
+            output = np.empty((len(records), self.number_of_features), dtype="float64")
+            offset = 0
+            for columns, operations in self.blocks:
+                is_categorical = any(operation in [ORDINAL_OPERATION, ONE_HOT_OPERATION] for operation, _ in operations)
+                block_values = np.empty((len(records), len(columns)), dtype=object if is_categorical else "float64")
+                for row, record in enumerate(records):
+                    for index, column in enumerate(columns):
+                        value = record[column]
+                        block_values[row, index] = value if is_categorical else (np.nan if value is None else value)
+                block_output = self.transform_block(block_values, operations)
+                output[:, offset:offset + block_output.shape[1]] = block_output
+                offset += block_output.shape[1]
+            if self.sparse_output:
+                return sparse.csr_matrix(output)
+            return output
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
+def compile_preprocessing_object(preprocessing_object, X) -> CompiledPreprocessor:
+    """
+    Compiles fitted preprocessing object and checks that it gives exactly same output on X
+    preprocessing_object: fitted ColumnTransformer
+    X: dataframe used for the check
+    """
+    try:
+        compiled_preprocessor = CompiledPreprocessor(preprocessing_object)
+        expected = preprocessing_object.transform(X)
+        actual = compiled_preprocessor.transform(X)
+        if sparse.issparse(expected):
+            expected = expected.toarray()
+        if sparse.issparse(actual):
+            actual = actual.toarray()
+        if expected.shape != actual.shape or not np.array_equal(expected, actual, equal_nan=True):
+            raise Exception("Compiled preprocessor output is not same as preprocessing object output")
+        return compiled_preprocessor
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -6,20 +6,42 @@ from collections import namedtuple
 
 
 DataIngestionConfig=namedtuple("DataIngestionConfig",
-["dataset_download_url","raw_data_dir","ingested_train_dir","ingested_test_dir"])
+["dataset_download_url","raw_data_dir","ingested_train_dir","ingested_test_dir","cache_dir",
+ "test_size","random_state","chunk_size","raw_data_file_pattern","num_workers",
+ "ingested_file_format","schema_file_path"])
 
 TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir"])
 
-DataValidationConfig = namedtuple("DataValidationConfig", ["schema_file_path"])
+DataValidationConfig = namedtuple("DataValidationConfig", ["schema_file_path", "report_file_path", "num_workers"])
+
+DataDriftConfig = namedtuple("DataDriftConfig", ["drift_report_file_path", "reference_sketch_file_path",
+                                                 "reference_sketch_file_name", "model_evaluation_file_path",
+                                                 "num_bins", "psi_threshold", "ks_threshold", "fail_on_drift"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig", ["transformed_train_dir",
                                                                    "transformed_test_dir",
-                                                                   "preprocessed_object_file_path"])
+                                                                   "preprocessed_object_file_path",
+                                                                   "cache_dir",
+                                                                   "rebalancing_strategy",
+                                                                   "rebalancing_sampling_strategy",
+                                                                   "rebalancing_random_state",
+                                                                   "transformed_array_dtype",
+                                                                   "compiled_preprocessed_object_file_path"])
 
-ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy", "model_config_file_path"])
+ModelTrainerConfig = namedtuple("ModelTrainerConfig", ["trained_model_file_path","base_accuracy", "model_config_file_path",
+                                                       "reference_sketch_file_path", "class_weight",
+                                                       "cv_result_cache_dir", "cv_result_cache_max_size_mb",
+                                                       "save_shared_arrays", "shared_array_min_size_kb"])
 
-ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_file_path","time_stamp"])
+ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_file_path","time_stamp","cache_dir"])
 
 ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
 
+BatchPredictionConfig = namedtuple("BatchPredictionConfig", ["model_export_dir", "model_file_name", "schema_file_path",
+                                                             "chunk_size", "num_workers"])
+
+PredictionServiceConfig = namedtuple("PredictionServiceConfig", ["model_export_dir", "model_file_name",
+                                                                 "max_batch_size", "max_wait_ms", "cache_max_size",
+                                                                 "cache_ttl_seconds", "model_check_interval_seconds"])
+
 
@@ -0,0 +1,83 @@
+#transformers used inside the preprocessing object, they are saved with it in preprocessed.pkl
+#so the same steps run on train, test and prediction data
+from visa.exception import CustomException
+import numpy as np
+import sys
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+from visa.constant import *
+
+
+class OutlierCapper(BaseEstimator, TransformerMixin):
+    """
+    Caps every column between q1 - factor * iqr and q3 + factor * iqr
+    limits are learned from training data in fit and applied with np.clip in transform
+    factor: float multiple of iqr allowed outside the quartiles
+    min_unique_values: int columns with less unique values are treated as discrete and never capped
+    data_profile: dict profile of the training data from validation report, when it has all the columns
+                  its quartiles and cardinality are used instead of computing them again in fit
+    """
+
+    def __init__(self, factor: float = 1.5, min_unique_values: int = 25, data_profile: dict = None):
+        self.factor = factor
+        self.min_unique_values = min_unique_values
+        self.data_profile = data_profile
+
+#quartiles and unique counts of the columns from data profile, None if profile does not have them
+    def get_profile_statistics(self):
+        columns = getattr(self, "feature_names_in_", None)
+        if self.data_profile is None or columns is None:
+            return None
+        try:
+            column_profiles = [self.data_profile[column] for column in columns]
+            percentile25 = np.array([profile[DATA_PROFILE_QUANTILES_KEY][0.25] for profile in column_profiles])
+            percentile75 = np.array([profile[DATA_PROFILE_QUANTILES_KEY][0.75] for profile in column_profiles])
+            unique_counts = np.array([profile[DATA_PROFILE_CARDINALITY_KEY] for profile in column_profiles])
+            return percentile25, percentile75, unique_counts
+        except (KeyError, TypeError):
+            return None
+
+    def fit(self, X, y=None):
+        try:
+            if hasattr(X, "columns"):
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            X = np.asarray(X, dtype="float64")
+            self.n_features_in_ = X.shape[1]
+
+            profile_statistics = self.get_profile_statistics()
+            if profile_statistics is not None:
+                percentile25, percentile75, unique_counts = profile_statistics
+            else:
+                #quartiles of all the columns in one call
+                percentile25, percentile75 = np.nanquantile(X, [0.25, 0.75], axis=0)
+
+                #unique values of every column from one sort, nan are sorted at the end and not counted
+                sorted_X = np.sort(X, axis=0)
+                is_new_value = np.diff(sorted_X, axis=0) != 0
+                is_new_value &= ~np.isnan(sorted_X[1:])
+                unique_counts = is_new_value.sum(axis=0) + (~np.isnan(sorted_X[:1])).sum(axis=0)
+
+            iqr = percentile75 - percentile25
+            lower_limits = percentile25 - self.factor * iqr
+            upper_limits = percentile75 + self.factor * iqr
+            is_capped = unique_counts >= self.min_unique_values
+
+            self.lower_limits_ = np.where(is_capped, lower_limits, -np.inf)
+            self.upper_limits_ = np.where(is_capped, upper_limits, np.inf)
+            return self
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform(self, X):
+        try:
+            check_is_fitted(self, ["lower_limits_", "upper_limits_"])
+            return np.clip(np.asarray(X, dtype="float64"), self.lower_limits_, self.upper_limits_)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_feature_names_out(self, input_features=None):
+        if input_features is not None:
+            return np.asarray(input_features, dtype=object)
+        if hasattr(self, "feature_names_in_"):
+            return self.feature_names_in_
+        return np.asarray([f"x{index}" for index in range(self.n_features_in_)], dtype=object)
@@ -0,0 +1,107 @@
+#cross validation scores of already searched candidates are kept on disk and shared by all the runs,
+#so a search only fits candidates whose estimator, params, training data or cv setup is new.
+#every result is a small yaml file named by its key, least recently used files are removed when
+#the store is bigger than its size limit.
+import os
+import sys
+from visa.logger import logging
+from visa.exception import CustomException
+from visa.utils.utils import read_yaml_file, write_yaml_file, get_cache_key
+
+CV_RESULT_FILE_EXTENSION = ".yaml"
+CV_RESULT_SCORE_KEY = "score"
+CV_RESULT_MODEL_KEY = "model"
+CV_RESULT_PARAMS_KEY = "params"
+
+#params which only change speed or logging of a fit and not its score
+NON_SCORING_PARAMS = ["n_jobs", "verbose", "pre_dispatch", "refit", "return_train_score", "error_score"]
+
+#change this when the way scores are computed changes so old scores are not reused
+CV_RESULT_STORE_VERSION = 1
+
+
+class CVResultStore:
+    """
+    On disk store of cross validation scores
+    store_dir: str folder of the result files
+    max_size_mb: float least recently used results are removed above this size
+    """
+
+    def __init__(self, store_dir: str, max_size_mb: float):
+        try:
+            self.store_dir = store_dir
+            self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+            os.makedirs(self.store_dir, exist_ok=True)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def get_result_key(estimator, data_fingerprint: str, cv_params: dict) -> str:
+        """
+        Returns key of the cv score of an estimator
+        estimator: estimator with the candidate params already set
+        data_fingerprint: str hash of training data
+        cv_params: dict params of the search object (cv, scoring ...)
+        """
+        try:
+            estimator_params = {name: value for name, value in estimator.get_params(deep=False).items()
+                                if name not in NON_SCORING_PARAMS}
+            cv_params = {name: value for name, value in cv_params.items() if name not in NON_SCORING_PARAMS}
+            return get_cache_key(f"{type(estimator).__module__}.{type(estimator).__name__}",
+                                 sorted(estimator_params.items()),
+                                 data_fingerprint,
+                                 sorted(cv_params.items()),
+                                 CV_RESULT_STORE_VERSION)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_result_file_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}{CV_RESULT_FILE_EXTENSION}")
+
+    def get(self, key: str):
+        """
+        Returns stored score of the key, None if it is not in the store
+        """
+        try:
+            result_file_path = self.get_result_file_path(key)
+            if not os.path.exists(result_file_path):
+                return None
+            result = read_yaml_file(file_path=result_file_path)
+            #modified time is the last use of the result, used for eviction
+            os.utime(result_file_path)
+            return result[CV_RESULT_SCORE_KEY]
+        except Exception as e:
+            logging.info(f"Could not read cv result [{key}]: {e}")
+            return None
+
+    def put(self, key: str, score: float, estimator):
+        try:
+            write_yaml_file(file_path=self.get_result_file_path(key), data={
+                CV_RESULT_MODEL_KEY: type(estimator).__name__,
+                CV_RESULT_PARAMS_KEY: str(estimator.get_params(deep=False)),
+                CV_RESULT_SCORE_KEY: float(score),
+            })
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#removing least recently used results till store is under its size limit
+    def evict(self):
+        try:
+            result_files = []
+            for file_name in os.listdir(self.store_dir):
+                if file_name.endswith(CV_RESULT_FILE_EXTENSION):
+                    file_stat = os.stat(os.path.join(self.store_dir, file_name))
+                    result_files.append((file_stat.st_mtime, file_stat.st_size, file_name))
+
+            store_size = sum(file_size for _, file_size, _ in result_files)
+            number_of_removed_files = 0
+            for _, file_size, file_name in sorted(result_files):
+                if store_size <= self.max_size_bytes:
+                    break
+                os.remove(os.path.join(self.store_dir, file_name))
+                store_size -= file_size
+                number_of_removed_files += 1
+            if number_of_removed_files > 0:
+                logging.info(f"Removed {number_of_removed_files} least recently used cv results from [{self.store_dir}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
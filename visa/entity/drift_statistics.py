@@ -0,0 +1,109 @@
+#compact sketch of the training data (histograms and category frequencies) and drift statistics
+#of new data against that sketch. Raw training data is never needed once the sketch is saved.
+from visa.exception import CustomException
+from visa.constant import *
+import numpy as np
+import pandas as pd
+import sys
+
+#small value used in place of zero proportion, else psi becomes infinite
+PSI_EPSILON = 1e-4
+
+
+def is_numerical_column(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def get_bin_counts(values: np.ndarray, bin_edges: np.ndarray) -> np.ndarray:
+    """
+    Counts values falling in every bin, bins are (-inf, e1), [e1, e2) ... [en, inf)
+    searchsorted + bincount is a single vectorized pass over the values
+    """
+    try:
+        values = values[~np.isnan(values)]
+        bin_index = np.searchsorted(bin_edges, values, side="right")
+        return np.bincount(bin_index, minlength=len(bin_edges) + 1)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def build_reference_sketch(dataframe: pd.DataFrame, columns: list, num_bins: int) -> dict:
+    """
+    Returns sketch of given columns
+    numerical column: quantile bin edges and proportion of rows in every bin
+    categorical column: proportion of every category
+    """
+    try:
+        sketch = {DRIFT_SKETCH_NUMBER_OF_ROWS_KEY: int(len(dataframe)), DRIFT_SKETCH_COLUMNS_KEY: {}}
+        for column in columns:
+            if column not in dataframe.columns:
+                continue
+            series = dataframe[column]
+            if is_numerical_column(series):
+                values = series.to_numpy(dtype="float64")
+                values = values[~np.isnan(values)]
+                bin_edges = np.unique(np.quantile(values, np.linspace(0, 1, num_bins + 1)[1:-1]))
+                counts = get_bin_counts(values, bin_edges)
+                sketch[DRIFT_SKETCH_COLUMNS_KEY][column] = {
+                    DRIFT_SKETCH_TYPE_KEY: DRIFT_SKETCH_NUMERICAL_TYPE,
+                    DRIFT_SKETCH_BIN_EDGES_KEY: [float(edge) for edge in bin_edges],
+                    DRIFT_SKETCH_FREQUENCIES_KEY: [float(proportion) for proportion in counts / max(counts.sum(), 1)],
+                }
+            else:
+                frequencies = series.value_counts(normalize=True, dropna=True)
+                sketch[DRIFT_SKETCH_COLUMNS_KEY][column] = {
+                    DRIFT_SKETCH_TYPE_KEY: DRIFT_SKETCH_CATEGORICAL_TYPE,
+                    DRIFT_SKETCH_FREQUENCIES_KEY: {(value.item() if hasattr(value, "item") else value): float(proportion)
+                                                   for value, proportion in frequencies.items()},
+                }
+        return sketch
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    try:
+        expected = np.clip(expected, PSI_EPSILON, None)
+        actual = np.clip(actual, PSI_EPSILON, None)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def compute_drift_statistics(dataframes: list, reference_sketch: dict) -> dict:
+    """
+    Returns psi of every sketched column and ks statistic of numerical columns.
+    Counts of all the dataframes (train and test) are added so they are never concatenated.
+    ks statistic is the biggest gap between both cdf at the sketch bin edges.
+    """
+    try:
+        drift_statistics = {}
+        for column, column_sketch in reference_sketch[DRIFT_SKETCH_COLUMNS_KEY].items():
+            column_dataframes = [dataframe for dataframe in dataframes if column in dataframe.columns]
+            if len(column_dataframes) == 0:
+                continue
+            if column_sketch[DRIFT_SKETCH_TYPE_KEY] == DRIFT_SKETCH_NUMERICAL_TYPE:
+                bin_edges = np.asarray(column_sketch[DRIFT_SKETCH_BIN_EDGES_KEY], dtype="float64")
+                expected = np.asarray(column_sketch[DRIFT_SKETCH_FREQUENCIES_KEY], dtype="float64")
+                counts = sum(get_bin_counts(dataframe[column].to_numpy(dtype="float64"), bin_edges)
+                             for dataframe in column_dataframes)
+                actual = counts / max(counts.sum(), 1)
+                ks_statistic = float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected))))
+            else:
+                expected_frequencies = pd.Series(column_sketch[DRIFT_SKETCH_FREQUENCIES_KEY], dtype="float64")
+                counts = pd.Series(dtype="float64")
+                for dataframe in column_dataframes:
+                    counts = counts.add(dataframe[column].value_counts(dropna=True), fill_value=0)
+                #categories never seen in reference are also part of the psi
+                categories = expected_frequencies.index.union(counts.index)
+                expected = expected_frequencies.reindex(categories, fill_value=0).to_numpy()
+                counts = counts.reindex(categories, fill_value=0).to_numpy()
+                actual = counts / max(counts.sum(), 1)
+                ks_statistic = None
+            drift_statistics[column] = {
+                DRIFT_REPORT_PSI_KEY: get_population_stability_index(expected=expected, actual=actual),
+                DRIFT_REPORT_KS_KEY: ks_statistic,
+            }
+        return drift_statistics
+    except Exception as e:
+        raise CustomException(e, sys) from e
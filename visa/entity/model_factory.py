@@ -9,7 +9,16 @@ import sys
 from collections import namedtuple
 from typing import List
 from visa.logger import logging
-from sklearn.metrics import accuracy_score, f1_score
+from joblib import parallel_backend, effective_n_jobs, Parallel, delayed
+import time
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import check_cv
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 needed to import halving search
+from sklearn.model_selection import HalvingGridSearchCV
+from visa.entity.cv_result_store import CVResultStore
+from visa.utils.utils import get_array_hash
 
 #defining the variables from model.yaml
 GRID_SEARCH_KEY = 'grid_search'
@@ -18,11 +27,39 @@ CLASS_KEY = 'class'
 PARAM_KEY = 'params'
 MODEL_SELECTION_KEY = 'model_selection'
 SEARCH_PARAM_GRID_KEY = "search_param_grid"
+EXECUTION_KEY = "execution"
+N_JOBS_KEY = "n_jobs"
+BACKEND_KEY = "backend"
+SEARCH_STRATEGY_KEY = "strategy"
+N_ITER_KEY = "n_iter"
+FACTOR_KEY = "factor"
+RESOURCE_KEY = "resource"
+RANDOM_STATE_KEY = "random_state"
+TIME_BUDGET_KEY = "time_budget"
+
+#search strategies, random ones sample n_iter candidates and halving ones drop the worst candidates
+#after every iteration and give more resource (rows or n_estimators) to the rest
+GRID_SEARCH_STRATEGY = "grid"
+RANDOM_SEARCH_STRATEGY = "random"
+HALVING_GRID_SEARCH_STRATEGY = "halving_grid"
+HALVING_RANDOM_SEARCH_STRATEGY = "halving_random"
+SEARCH_STRATEGIES = [GRID_SEARCH_STRATEGY, RANDOM_SEARCH_STRATEGY, HALVING_GRID_SEARCH_STRATEGY,
+                     HALVING_RANDOM_SEARCH_STRATEGY]
+N_SAMPLES_RESOURCE = "n_samples"
+
+#models with warm_start keep their fitted trees when n_estimators is increased and fit only the new ones
+WARM_START_PARAM = "warm_start"
+N_ESTIMATORS_PARAM = "n_estimators"
+#models with random_state None or a RandomState object give other scores on every fit
+RANDOM_STATE_PARAM = "random_state"
+CV_KEY = "cv"
+SCORING_KEY = "scoring"
 
 #defining named tuple to call above variables
 #for model
 InitializedModelDetail = namedtuple("InitializedModelDetail",
-                                    ["model_serial_number", "model", "param_grid_search", "model_name"])
+                                    ["model_serial_number", "model", "param_grid_search", "model_name",
+                                     "resource", "time_budget"])
 
 #for grid search
 GridSearchedBestModel = namedtuple("GridSearchedBestModel", ["model_serial_number",
@@ -43,48 +80,116 @@ MetricInfoArtifact = namedtuple("MetricInfoArtifact",
                                  "test_accuracy", "model_accuracy", "index_number"])
 
 
-# can be used in case of classification model
-def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
-                                  y_test: np.ndarray, base_accuracy: float = 0.6) -> MetricInfoArtifact:
+def get_classification_metrics(y_true: np.ndarray, y_pred: np.ndarray, pos_label=1) -> tuple:
+    """
+    Returns accuracy and f1 score of pos_label from one confusion matrix, same values as
+    accuracy_score and f1_score but labels are counted only once
+    """
+    y_true, y_pred = np.asarray(y_true).ravel(), np.asarray(y_pred).ravel()
+    labels = np.union1d(y_true, y_pred)
+    number_of_labels = len(labels)
+    confusion_matrix = np.bincount(np.searchsorted(labels, y_true) * number_of_labels + np.searchsorted(labels, y_pred),
+                                   minlength=number_of_labels * number_of_labels
+                                   ).reshape(number_of_labels, number_of_labels)
+    accuracy = float(np.trace(confusion_matrix) / confusion_matrix.sum())
+
+    #f1 is 0 when there is no true or predicted positive, same as f1_score with zero_division warning
+    f1 = 0.0
+    if pos_label in labels:
+        pos_index = int(np.searchsorted(labels, pos_label))
+        true_positive = confusion_matrix[pos_index, pos_index]
+        predicted_positive = confusion_matrix[:, pos_index].sum()
+        actual_positive = confusion_matrix[pos_index, :].sum()
+        precision = true_positive / predicted_positive if predicted_positive > 0 else 0.0
+        recall = true_positive / actual_positive if actual_positive > 0 else 0.0
+        if precision + recall > 0:
+            f1 = float(2 * precision * recall / (precision + recall))
+    return accuracy, f1
+
+
+def get_predict_function(model, is_transformed: bool = False):
+    #models with their own preprocessing predict transformed features with predict_transformed
+    if is_transformed and hasattr(model, "predict_transformed"):
+        return model.predict_transformed
+    return model.predict
+
+
+def get_model_predictions(model_list: list, X_train, X_test, n_jobs: int = -1, is_transformed: bool = False) -> List[tuple]:
+    """
+    Returns (train prediction, test prediction) of every model, all the predictions run together on
+    threads (predict of sklearn models mostly releases the GIL)
+    n_jobs: number of threads, -1 means all the cores
+    is_transformed: True if X_train and X_test are already transformed by preprocessing object of the models
+    """
+    try:
+        predictions = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(get_predict_function(model, is_transformed=is_transformed))(X)
+            for model in model_list
+            for X in [X_train, X_test]
+        )
+        return [(predictions[2 * index], predictions[2 * index + 1]) for index in range(len(model_list))]
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_metric_info(model, index_number: int, y_train: np.ndarray, y_train_pred: np.ndarray, y_test: np.ndarray,
+                    y_test_pred: np.ndarray) -> MetricInfoArtifact:
+    #metrics of one split are computed together from its predictions
+    train_acc, train_f1 = get_classification_metrics(y_train, y_train_pred)
+    test_acc, test_f1 = get_classification_metrics(y_test, y_test_pred)
+
+    # Calculating harmonic mean of train_accuracy and test_accuracy
+    model_accuracy = (2 * (train_acc * test_acc)) / (train_acc + test_acc)
+    return MetricInfoArtifact(model_name=str(model),
+                              model_object=model,
+                              train_f1=train_f1,
+                              test_f1=test_f1,
+                              train_accuracy=train_acc,
+                              test_accuracy=test_acc,
+                              model_accuracy=model_accuracy,
+                              index_number=index_number)
+
+
+def evaluate_classification_models(model_list: list, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
+                                   y_test: np.ndarray, n_jobs: int = -1,
+                                   is_transformed: bool = False) -> List[MetricInfoArtifact]:
     """
     Description:
-    This function compare multiple classification models and returns best model
+    This function computes metrics of every model, train and test predictions of all the models
+    run together on threads
     Params:
     model_list: List of model
     X_train: Training dataset input feature
     y_train: Training dataset target feature
     X_test: Testing dataset input feature
     y_test: Testing dataset input feature
+    n_jobs: number of threads, -1 means all the cores
+    is_transformed: True if inputs are already transformed by preprocessing object of the models
     return
-    It returned a named tuple
-    
-    MetricInfoArtifact = namedtuple("MetricInfo",
-                                ["model_name", "model_object", "train_f1", "train_f1", "train_accuracy",
-                                 "test_accuracy", "model_accuracy", "index_number"])
+    List of MetricInfoArtifact in order of model_list
     """
     try:
+        model_predictions = get_model_predictions(model_list=model_list, X_train=X_train, X_test=X_test,
+                                                  n_jobs=n_jobs, is_transformed=is_transformed)
+        return [get_metric_info(model=model, index_number=index_number, y_train=y_train, y_train_pred=y_train_pred,
+                                y_test=y_test, y_test_pred=y_test_pred)
+                for index_number, (model, (y_train_pred, y_test_pred)) in enumerate(zip(model_list, model_predictions))]
+    except Exception as e:
+        raise CustomException(e, sys) from e
 
-        index_number = 0
-        metric_info_artifact = None # Model accuracy is none becuase right now we didn't have any model where we can check accuracy
-        for model in model_list:
-            model_name = str(model)  # getting model name based on model object
-            logging.info(f"{'>>' * 30}Started evaluating model: [{type(model).__name__}] {'<<' * 30}")
-
-            # Getting prediction for training and testing dataset
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
-
-            # Calculating r squared score on training and testing dataset
-            train_acc = accuracy_score(y_train, y_train_pred)
-            test_acc = accuracy_score(y_test, y_test_pred)
-
-
-            # Calculating mean squared error on training and testing dataset
-            train_f1 = f1_score(y_train, y_train_pred)
-            test_f1 = f1_score(y_test, y_test_pred)
 
-            # Calculating harmonic mean of train_accuracy and test_accuracy
-            model_accuracy = (2 * (train_acc * test_acc)) / (train_acc + test_acc)
+def get_best_metric_info(metric_info_artifacts: List[MetricInfoArtifact],
+                         base_accuracy: float = 0.6) -> MetricInfoArtifact:
+    """
+    Returns metrics of the best acceptable model, later model wins on same accuracy
+    model is acceptable if its model accuracy is at least base accuracy and train and test accuracy are close
+    """
+    try:
+        metric_info_artifact = None # Model accuracy is none becuase right now we didn't have any model where we can check accuracy
+        for model_metric_info in metric_info_artifacts:
+            logging.info(f"{'>>' * 30}Evaluated model: [{type(model_metric_info.model_object).__name__}] {'<<' * 30}")
+            train_acc, test_acc = model_metric_info.train_accuracy, model_metric_info.test_accuracy
+            model_accuracy = model_metric_info.model_accuracy
             diff_test_train_acc = abs(test_acc - train_acc)
 
             # logging all important metric
@@ -94,24 +199,15 @@ def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train
 
             logging.info(f"{'>>' * 30} F1 Score {'<<' * 30}")
             logging.info(f"Diff test train accuracy: [{diff_test_train_acc}].")
-            logging.info(f"Train root mean squared error: [{train_f1}].")
-            logging.info(f"Test root mean squared error: [{test_f1}].")
+            logging.info(f"Train f1 score: [{model_metric_info.train_f1}].")
+            logging.info(f"Test f1 score: [{model_metric_info.test_f1}].")
 
             # if model accuracy is greater than base accuracy and train and test score is within certain threshold
             # we will accept that model as accepted model
             if model_accuracy >= base_accuracy and diff_test_train_acc < 0.10:
                 base_accuracy = model_accuracy
-                metric_info_artifact = MetricInfoArtifact(model_name=model_name,
-                                                          model_object=model,
-                                                          train_f1=train_f1,
-                                                          test_f1=test_f1,
-                                                          train_accuracy=train_acc,
-                                                          test_accuracy=test_acc,
-                                                          model_accuracy=model_accuracy,
-                                                          index_number=index_number)
-
+                metric_info_artifact = model_metric_info
                 logging.info(f"Acceptable model found {metric_info_artifact}. ")
-            index_number += 1
         if metric_info_artifact is None:
             logging.info(f"No model found with higher accuracy than base accuracy")
         return metric_info_artifact
@@ -119,6 +215,102 @@ def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train
         raise CustomException(e, sys) from e
 
 
+# can be used in case of classification model
+def evaluate_classification_model(model_list: list, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
+                                  y_test: np.ndarray, base_accuracy: float = 0.6,
+                                  n_jobs: int = -1, is_transformed: bool = False) -> MetricInfoArtifact:
+    """
+    Description:
+    This function compare multiple classification models and returns best model
+    Params:
+    model_list: List of model
+    X_train: Training dataset input feature
+    y_train: Training dataset target feature
+    X_test: Testing dataset input feature
+    y_test: Testing dataset input feature
+    n_jobs: number of threads used to evaluate the models
+    is_transformed: True if inputs are already transformed by preprocessing object of the models
+    return
+    It returned a named tuple
+    
+    MetricInfoArtifact = namedtuple("MetricInfo",
+                                ["model_name", "model_object", "train_f1", "train_f1", "train_accuracy",
+                                 "test_accuracy", "model_accuracy", "index_number"])
+    """
+    try:
+        metric_info_artifacts = evaluate_classification_models(model_list=model_list, X_train=X_train,
+                                                               y_train=y_train, X_test=X_test, y_test=y_test,
+                                                               n_jobs=n_jobs, is_transformed=is_transformed)
+        return get_best_metric_info(metric_info_artifacts=metric_info_artifacts, base_accuracy=base_accuracy)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def has_fixed_random_state(estimator) -> bool:
+    """
+    True when every random_state of the estimator (and its nested estimators) is an int,
+    estimators without random_state are deterministic and also give True
+    """
+    return all(isinstance(value, (int, np.integer)) for key, value in estimator.get_params().items()
+               if key == RANDOM_STATE_PARAM or key.endswith(f"__{RANDOM_STATE_PARAM}"))
+
+
+def fit_warm_start_fold(estimator, n_estimators_values: list, X, y, train: np.ndarray, test: np.ndarray,
+                        scorer) -> list:
+    """
+    Grows a warm started estimator on one cv fold and scores it at every n_estimators value
+    trees of a smaller value are reused by the bigger one. estimator must have an int random_state,
+    only then the trees are same as the trees of an independent fit so the scores are also same
+    n_estimators_values: list increasing n_estimators values
+    return: list of test fold scores in order of n_estimators_values
+    """
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    scores = []
+    for n_estimators in n_estimators_values:
+        estimator.set_params(**{N_ESTIMATORS_PARAM: n_estimators})
+        estimator.fit(X_train, y_train)
+        scores.append(scorer(estimator, X_test, y_test))
+    return scores
+
+
+class TimeBudgetUsed(Exception):
+    """
+    Raised by TimeBudgetHalvingGridSearchCV before an iteration when its time budget is used
+    """
+
+
+class TimeBudgetHalvingGridSearchCV(HalvingGridSearchCV):
+    """
+    HalvingGridSearchCV which checks time_budget (seconds, None for no budget) before every iteration
+    after the first. When the budget is used the next iterations are not run and best candidate is taken
+    from the last finished iteration, so a budget never fits more than the search without it
+    """
+    time_budget = None
+
+    def _run_search(self, evaluate_candidates):
+        start_time = time.monotonic()
+        number_of_iterations = 0
+
+        def evaluate_candidates_in_budget(candidate_params, cv=None, more_results=None):
+            nonlocal number_of_iterations
+            elapsed_time = time.monotonic() - start_time
+            if self.time_budget is not None and number_of_iterations > 0 and elapsed_time >= self.time_budget:
+                raise TimeBudgetUsed()
+            results = evaluate_candidates(candidate_params, cv, more_results=more_results)
+            number_of_iterations += 1
+            return results
+
+        try:
+            super()._run_search(evaluate_candidates_in_budget)
+        except TimeBudgetUsed:
+            logging.info(f"Time budget of {self.time_budget} seconds used after {number_of_iterations} halving "
+                         f"iterations, keeping best candidate of last iteration")
+            #resources and candidates of the iteration which was not run are dropped
+            self.n_resources_ = self.n_resources_[:number_of_iterations]
+            self.n_candidates_ = self.n_candidates_[:number_of_iterations]
+            self.n_iterations_ = number_of_iterations
+
+
 def evaluate_regression_model(model_list: list, X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray,
                               y_test: np.ndarray, base_accuracy: float = 0.6) -> MetricInfoArtifact:
     pass
@@ -134,9 +326,18 @@ def get_sample_model_config_yaml_file(export_dir: str):
                 PARAM_KEY: {
                     "cv": 3,
                     "verbose": 1
-                }
+                },
+                SEARCH_STRATEGY_KEY: GRID_SEARCH_STRATEGY,
+                N_ITER_KEY: 10,
+                FACTOR_KEY: 3,
+                RESOURCE_KEY: N_SAMPLES_RESOURCE,
+                RANDOM_STATE_KEY: 42
 
             },
+            EXECUTION_KEY: {
+                N_JOBS_KEY: -1,
+                BACKEND_KEY: "loky"
+            },
             MODEL_SELECTION_KEY: {
                 "module_0": {
                     MODULE_KEY: "module_of_model",
@@ -147,7 +348,9 @@ def get_sample_model_config_yaml_file(export_dir: str):
                          },
                     SEARCH_PARAM_GRID_KEY: {
                         "param_name": ['param_value_1', 'param_value_2']
-                    }
+                    },
+                    TIME_BUDGET_KEY: None,
+                    RESOURCE_KEY: N_SAMPLES_RESOURCE
 
                 },
             }
@@ -165,17 +368,36 @@ def get_sample_model_config_yaml_file(export_dir: str):
 ######### starts from here
 #making a constructor and calling the above variables
 class ModelFactory:
-    def __init__(self, model_config_path: str = None, ):
+    def __init__(self, model_config_path: str = None, class_weight=None, cv_result_store: CVResultStore = None):
         try:
             self.config: dict = ModelFactory.read_params(model_config_path)
+            #given to every model which has class_weight param, class_weight in model.yaml params still wins
+            self.class_weight = class_weight
+            #cv scores of earlier runs, every candidate is fitted when it is None
+            self.cv_result_store = cv_result_store
             
             
             self.grid_search_cv_module: str = self.config[GRID_SEARCH_KEY][MODULE_KEY]
             self.grid_search_class_name: str = self.config[GRID_SEARCH_KEY][CLASS_KEY]
             self.grid_search_property_data: dict = dict(self.config[GRID_SEARCH_KEY][PARAM_KEY])
 
+            #how candidates are picked and evaluated, grid search of every candidate if not given
+            self.search_strategy: str = self.config[GRID_SEARCH_KEY].get(SEARCH_STRATEGY_KEY, GRID_SEARCH_STRATEGY)
+            if self.search_strategy not in SEARCH_STRATEGIES:
+                raise Exception(f"Search strategy [{self.search_strategy}] is not one of {SEARCH_STRATEGIES}")
+            self.n_iter: int = self.config[GRID_SEARCH_KEY].get(N_ITER_KEY, 10)
+            self.factor = self.config[GRID_SEARCH_KEY].get(FACTOR_KEY, 3)
+            self.resource: str = self.config[GRID_SEARCH_KEY].get(RESOURCE_KEY, N_SAMPLES_RESOURCE)
+            self.random_state = self.config[GRID_SEARCH_KEY].get(RANDOM_STATE_KEY, None)
+
             self.models_initialization_config: dict = dict(self.config[MODEL_SELECTION_KEY])
 
+            #candidate x fold fits of every search run on one worker pool of this backend, shared by all the models
+            #n_jobs -1 means all the cores, None or 1 runs everything in this process
+            execution_config = self.config.get(EXECUTION_KEY) or {}
+            self.n_jobs = execution_config.get(N_JOBS_KEY, None)
+            self.backend: str = execution_config.get(BACKEND_KEY, "loky")
+
             #none is mentione in below because at first time we dont have any trained model
             self.initialized_model_list = None
             self.grid_searched_best_model_list = None 
@@ -227,6 +449,139 @@ class ModelFactory:
             raise CustomException(e, sys) from e
 
 
+#candidate parameters of a model, every combination of the grid or n_iter sampled combinations
+#param used as halving resource is not a candidate param, halving search sets it itself
+    def get_candidate_params(self, initialized_model: InitializedModelDetail) -> List[dict]:
+        try:
+            param_grid = dict(initialized_model.param_grid_search or {})
+            if self.is_halving_search() and initialized_model.resource != N_SAMPLES_RESOURCE:
+                param_grid.pop(initialized_model.resource, None)
+            if self.search_strategy in [RANDOM_SEARCH_STRATEGY, HALVING_RANDOM_SEARCH_STRATEGY]:
+                return list(ParameterSampler(param_grid, n_iter=self.n_iter, random_state=self.random_state))
+            return list(ParameterGrid(param_grid))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def is_halving_search(self) -> bool:
+        return self.search_strategy in [HALVING_GRID_SEARCH_STRATEGY, HALVING_RANDOM_SEARCH_STRATEGY]
+
+#search object evaluating given candidates, best model is fitted later once for all the batches so refit is off
+    def get_search_object(self, initialized_model: InitializedModelDetail, candidate_params: List[dict]):
+        try:
+            param_grid = [{key: [value] for key, value in candidate.items()} for candidate in candidate_params]
+            if self.is_halving_search():
+                search_cv = TimeBudgetHalvingGridSearchCV(estimator=initialized_model.model, param_grid=param_grid,
+                                                          factor=self.factor, resource=initialized_model.resource,
+                                                          random_state=self.random_state)
+                search_cv.time_budget = initialized_model.time_budget
+                if initialized_model.resource != N_SAMPLES_RESOURCE:
+                    #largest value of the resource in the grid, else the value model is configured with
+                    resource_values = (initialized_model.param_grid_search or {}).get(initialized_model.resource)
+                    search_cv.max_resources = max(resource_values) if resource_values else \
+                        initialized_model.model.get_params()[initialized_model.resource]
+            else:
+                # instantiating GridSearchCV class
+                grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
+                                                                 class_name=self.grid_search_class_name
+                                                                 )
+                #calling grid search
+                search_cv = grid_search_cv_ref(estimator=initialized_model.model, param_grid=param_grid)
+
+            #calling to update the params
+            search_cv = ModelFactory.update_property_of_class(search_cv, self.grid_search_property_data)
+            search_cv.refit = False
+
+            #search fans out its fits over the shared pool unless n_jobs is given in grid_search params
+            if self.n_jobs is not None and N_JOBS_KEY not in self.grid_search_property_data:
+                search_cv.n_jobs = self.n_jobs
+            return search_cv
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#keys of the candidates in cv result store, None when there is no store or scores of a halving search
+#depend on the other candidates it was run with. candidates without fixed random_state are not stored
+#as another fit would give another score
+    def get_candidate_result_keys(self, initialized_model: InitializedModelDetail, candidate_params: List[dict],
+                                  input_feature, output_feature) -> List[str]:
+        try:
+            if self.cv_result_store is None or self.is_halving_search():
+                return [None] * len(candidate_params)
+            data_fingerprint = get_array_hash(input_feature, output_feature)
+            result_keys = []
+            for candidate in candidate_params:
+                estimator = clone(initialized_model.model).set_params(**candidate)
+                if not has_fixed_random_state(estimator):
+                    result_keys.append(None)
+                    continue
+                result_keys.append(CVResultStore.get_result_key(estimator=estimator, data_fingerprint=data_fingerprint,
+                                                                cv_params=self.grid_search_property_data))
+            number_of_unseeded_candidates = result_keys.count(None)
+            if number_of_unseeded_candidates > 0:
+                logging.info(f"{number_of_unseeded_candidates} candidates of {type(initialized_model.model).__name__} "
+                             f"have no int {RANDOM_STATE_PARAM}, they are not read from or written to cv result store")
+            return result_keys
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#candidates which differ only in n_estimators, sorted by n_estimators so one warm started model can grow through them
+#halving search sets n_estimators itself and multi metric scoring is left to the search object.
+#candidates without fixed random_state are fitted independently, else their scores depend on the grouping
+    def get_warm_start_groups(self, initialized_model: InitializedModelDetail, candidate_params: List[dict],
+                              indexes: List[int]) -> List[List[int]]:
+        try:
+            scoring = self.grid_search_property_data.get(SCORING_KEY)
+            if self.is_halving_search() or WARM_START_PARAM not in initialized_model.model.get_params() or \
+                    not (scoring is None or isinstance(scoring, str)):
+                return []
+            groups = dict()
+            number_of_unseeded_candidates = 0
+            for index in indexes:
+                candidate = candidate_params[index]
+                if N_ESTIMATORS_PARAM not in candidate or WARM_START_PARAM in candidate:
+                    continue
+                if not has_fixed_random_state(clone(initialized_model.model).set_params(**candidate)):
+                    number_of_unseeded_candidates += 1
+                    continue
+                other_params = str(sorted((key, value) for key, value in candidate.items() if key != N_ESTIMATORS_PARAM))
+                groups.setdefault(other_params, []).append(index)
+            if number_of_unseeded_candidates > 0:
+                logging.info(f"{number_of_unseeded_candidates} candidates of {type(initialized_model.model).__name__} "
+                             f"have no int {RANDOM_STATE_PARAM}, they are not grown with warm start")
+            return [sorted(group, key=lambda index: candidate_params[index][N_ESTIMATORS_PARAM])
+                    for group in groups.values() if len(group) > 1]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#mean cv score of every candidate of the warm start groups, same folds and scorer as the search object
+#every (group, fold) pair is one job on the shared pool
+    def get_warm_start_scores(self, initialized_model: InitializedModelDetail, candidate_params: List[dict],
+                              warm_start_groups: List[List[int]], input_feature, output_feature) -> dict:
+        try:
+            model = initialized_model.model
+            cv = check_cv(self.grid_search_property_data.get(CV_KEY), output_feature, classifier=is_classifier(model))
+            splits = list(cv.split(input_feature, output_feature))
+            scorer = check_scoring(model, scoring=self.grid_search_property_data.get(SCORING_KEY))
+
+            jobs = []
+            for group in warm_start_groups:
+                group_params = {key: value for key, value in candidate_params[group[0]].items()
+                                if key != N_ESTIMATORS_PARAM}
+                estimator = clone(model).set_params(**group_params, **{WARM_START_PARAM: True})
+                n_estimators_values = [candidate_params[index][N_ESTIMATORS_PARAM] for index in group]
+                for train, test in splits:
+                    jobs.append(delayed(fit_warm_start_fold)(clone(estimator), n_estimators_values, input_feature,
+                                                             output_feature, train, test, scorer))
+            fold_scores = Parallel(n_jobs=self.n_jobs)(jobs)
+
+            warm_start_scores = dict()
+            for group_number, group in enumerate(warm_start_groups):
+                group_fold_scores = np.array(fold_scores[group_number * len(splits):(group_number + 1) * len(splits)])
+                for index, score in zip(group, np.average(group_fold_scores, axis=0)):
+                    warm_start_scores[index] = score
+            return warm_start_scores
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def execute_grid_search_operation(self, initialized_model: InitializedModelDetail, input_feature,
                                       output_feature) -> GridSearchedBestModel:
         """
@@ -236,35 +591,123 @@ class ModelFactory:
         param_grid: dictionary of parameter to perform search operation
         input_feature: you're all input features
         output_feature: Target/Dependent features
+        with time_budget candidates are searched in batches and no new batch is started once
+        the budget is used, best candidate found till then is returned. halving search is run once over
+        all the candidates and checks the budget before every iteration instead
+        candidates already in cv result store are not fitted again and candidates which differ only
+        in n_estimators are grown on one warm started model per fold
         ================================================================================
         return: Function will return GridSearchOperation object
         """
         try:
-            # instantiating GridSearchCV class
-            grid_search_cv_ref = ModelFactory.class_for_name(module_name=self.grid_search_cv_module,
-                                                             class_name=self.grid_search_class_name
-                                                             )
-
-            #calling grid search
-            grid_search_cv = grid_search_cv_ref(estimator=initialized_model.model,
-                                                param_grid=initialized_model.param_grid_search)
-
-             #calling to update the params                                   
-            grid_search_cv = ModelFactory.update_property_of_class(grid_search_cv,
-                                                                   self.grid_search_property_data)
+            candidate_params = self.get_candidate_params(initialized_model=initialized_model)
+            result_keys = self.get_candidate_result_keys(initialized_model=initialized_model,
+                                                         candidate_params=candidate_params,
+                                                         input_feature=input_feature,
+                                                         output_feature=output_feature)
+            #score of every searched candidate by its index in candidate_params
+            candidate_scores = dict()
+            for index, result_key in enumerate(result_keys):
+                if result_key is not None:
+                    score = self.cv_result_store.get(result_key)
+                    if score is not None:
+                        candidate_scores[index] = score
+            uncached_indexes = [index for index in range(len(candidate_params)) if index not in candidate_scores]
+
+            time_budget = initialized_model.time_budget
+            if time_budget is None or self.is_halving_search():
+                #halving in batches would run every batch up to full resource, so it is always one search
+                batch_size = len(candidate_params)
+            else:
+                #one batch keeps all the workers busy
+                batch_size = effective_n_jobs(self.n_jobs)
+            batch_size = max(batch_size, 1)
 
             message = f'{">>" * 30} f"Training {type(initialized_model.model).__name__} Started." {"<<" * 30}'
             logging.info(message)
-            grid_search_cv.fit(input_feature, output_feature)
-            
+            logging.info(f"Searching {len(uncached_indexes)} of {len(candidate_params)} candidates with strategy: "
+                         f"[{self.search_strategy}], time budget: [{time_budget}], "
+                         f"{len(candidate_scores)} candidates found in cv result store")
+
+            #warm start group is never split between batches, it counts as one candidate in batch size
+            warm_start_groups = self.get_warm_start_groups(initialized_model=initialized_model,
+                                                           candidate_params=candidate_params,
+                                                           indexes=uncached_indexes)
+            grouped_indexes = {group[0]: group for group in warm_start_groups}
+            warm_start_indexes = set(index for group in warm_start_groups for index in group)
+            search_units = [grouped_indexes.get(index, [index]) for index in uncached_indexes
+                            if index not in warm_start_indexes or index in grouped_indexes]
+
+            start_time = time.monotonic()
+            number_of_searched_candidates = 0
+            for batch_start in range(0, len(search_units), batch_size):
+                elapsed_time = time.monotonic() - start_time
+                if time_budget is not None and batch_start > 0 and elapsed_time >= time_budget:
+                    logging.info(f"Time budget of {time_budget} seconds used after {number_of_searched_candidates} "
+                                 f"of {len(uncached_indexes)} candidates, keeping best candidate found so far")
+                    break
+                batch_indexes = [index for unit in search_units[batch_start:batch_start + batch_size] for index in unit]
+                number_of_searched_candidates += len(batch_indexes)
+                warm_start_groups = self.get_warm_start_groups(initialized_model=initialized_model,
+                                                               candidate_params=candidate_params,
+                                                               indexes=batch_indexes)
+                batch_scores = self.get_warm_start_scores(initialized_model=initialized_model,
+                                                          candidate_params=candidate_params,
+                                                          warm_start_groups=warm_start_groups,
+                                                          input_feature=input_feature,
+                                                          output_feature=output_feature)
+                search_indexes = [index for index in batch_indexes if index not in batch_scores]
+                if len(batch_scores) > 0:
+                    logging.info(f"{len(batch_scores)} candidates scored with warm start in "
+                                 f"{len(warm_start_groups)} groups")
+
+                if len(search_indexes) > 0:
+                    search_cv = self.get_search_object(initialized_model=initialized_model,
+                                                       candidate_params=[candidate_params[index] for index in search_indexes])
+                    search_cv.fit(input_feature, output_feature)
+
+                    if self.is_halving_search():
+                        #only the last survivors are scored on full resource, so only the best one is kept
+                        #with its resource param (n_estimators) set by the halving search
+                        best_candidate = {key: value for key, value in search_cv.best_params_.items()
+                                          if key != initialized_model.resource}
+                        index = next(index for index in search_indexes if candidate_params[index] == best_candidate)
+                        candidate_scores[index] = search_cv.best_score_
+                        candidate_params[index] = search_cv.best_params_
+                    else:
+                        batch_scores.update(zip(search_indexes, search_cv.cv_results_["mean_test_score"]))
+
+                for index, score in batch_scores.items():
+                    candidate_scores[index] = score
+                    #failed fits have nan score, they are tried again in next run
+                    if result_keys[index] is not None and not np.isnan(score):
+                        self.cv_result_store.put(result_keys[index], score=score,
+                                                 estimator=clone(initialized_model.model).set_params(
+                                                     **candidate_params[index]))
+
+            if self.cv_result_store is not None:
+                self.cv_result_store.evict()
+
+            #first best wins on same score, same as a single search over all the candidates
+            best_index = None
+            for index in sorted(candidate_scores):
+                if best_index is None or candidate_scores[index] > candidate_scores[best_index]:
+                    best_index = index
+            best_parameters, best_score = candidate_params[best_index], float(candidate_scores[best_index])
+
+            #fitting best candidate on whole training data
+            best_model = clone(initialized_model.model).set_params(**best_parameters)
+            best_model.fit(input_feature, output_feature)
+
             message = f'{">>" * 30} f"Training {type(initialized_model.model).__name__}" completed {"<<" * 30}'
-            
+            logging.info(message)
+
             #will give you best model
             grid_searched_best_model = GridSearchedBestModel(model_serial_number=initialized_model.model_serial_number,
                                                              model=initialized_model.model,
-                                                             best_model=grid_search_cv.best_estimator_,
-                                                             best_parameters=grid_search_cv.best_params_,
-                                                             best_score=grid_search_cv.best_score_
+                                                             best_model=best_model,
+                                                             best_parameters=best_parameters,
+                                                             best_score=best_score
                                                              )
 
             return grid_searched_best_model
@@ -291,6 +734,14 @@ class ModelFactory:
                                                             class_name=model_initialization_config[CLASS_KEY]
                                                             )
                 model1 = model_obj_ref()
+
+                if self.class_weight is not None:
+                    if "class_weight" in model1.get_params():
+                        model1 = ModelFactory.update_property_of_class(instance_ref=model1,
+                                                                       property_data={"class_weight": self.class_weight})
+                    else:
+                        logging.info(f"{model_initialization_config[CLASS_KEY]} does not support class_weight, "
+                                     f"it is trained on unbalanced data")
  
                 #after picking the model with serial num, executing all parameters and if any changes in params do update
                 if PARAM_KEY in model_initialization_config:
@@ -299,13 +750,20 @@ class ModelFactory:
                     model1 = ModelFactory.update_property_of_class(instance_ref=model1,
                                                                    property_data=model_obj_property_data)
 
+                #model itself runs on one core when search is parallel, else every worker starts more threads than cores
+                if self.n_jobs not in [None, 1] and N_JOBS_KEY in model1.get_params() and \
+                        N_JOBS_KEY not in (model_initialization_config.get(PARAM_KEY) or {}):
+                    model1 = ModelFactory.update_property_of_class(instance_ref=model1, property_data={N_JOBS_KEY: 1})
+
                 param_grid_search = model_initialization_config[SEARCH_PARAM_GRID_KEY]
                 model_name = f"{model_initialization_config[MODULE_KEY]}.{model_initialization_config[CLASS_KEY]}"
 
                 model_initialization_config = InitializedModelDetail(model_serial_number=model_serial_number,
                                                                      model=model1,
                                                                      param_grid_search=param_grid_search,
-                                                                     model_name=model_name
+                                                                     model_name=model_name,
+                                                                     resource=model_initialization_config.get(RESOURCE_KEY, self.resource),
+                                                                     time_budget=model_initialization_config.get(TIME_BUDGET_KEY)
                                                                      )
 
                 initialized_model_list.append(model_initialization_config)
@@ -345,13 +803,17 @@ class ModelFactory:
 
         try:
             self.grid_searched_best_model_list = []
-            for initialized_model_list in initialized_model_list:
-                grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
-                    initialized_model=initialized_model_list,
-                    input_feature=input_feature,
-                    output_feature=output_feature
-                )
-                self.grid_searched_best_model_list.append(grid_searched_best_model)
+            #one backend for all the searches, loky keeps its workers alive between searches
+            #memory mapped training arrays are passed to workers by file reference and not copied
+            logging.info(f"Running searches with backend: [{self.backend}] and n_jobs: [{self.n_jobs}]")
+            with parallel_backend(self.backend, n_jobs=self.n_jobs):
+                for initialized_model_list in initialized_model_list:
+                    grid_searched_best_model = self.initiate_best_parameter_search_for_initialized_model(
+                        initialized_model=initialized_model_list,
+                        input_feature=input_feature,
+                        output_feature=output_feature
+                    )
+                    self.grid_searched_best_model_list.append(grid_searched_best_model)
             return self.grid_searched_best_model_list
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -0,0 +1,90 @@
+#in memory cache of predictions, applications sent again while a case is in review are not scored again.
+#key has the content hash of the model, so a new model never gets predictions of the old model.
+#least recently used entries are removed above max size and entries older than ttl are not used.
+import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from visa.exception import CustomException
+
+
+def get_canonical_value(value):
+    """
+    Same value in other types gives same key, 5 and 5.0 are same number and nan and None are missing
+    """
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    return str(value)
+
+
+class PredictionCache:
+    """
+    Thread safe LRU cache with time to live
+    max_size: int number of entries kept
+    ttl_seconds: float entries older than this are not used, None means no expiry
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = None):
+        try:
+            self.max_size = max_size
+            self.ttl_seconds = ttl_seconds
+            self.entries = OrderedDict()
+            self.lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expiry_time = entry
+            if expiry_time is not None and time.monotonic() > expiry_time:
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            expiry_time = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+            self.entries[key] = (value, expiry_time)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+#removing all the entries, used when a new model is loaded
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            number_of_lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / number_of_lookups, 4) if number_of_lookups > 0 else 0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
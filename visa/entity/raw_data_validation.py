@@ -1,34 +1,72 @@
-#defining functions for checking/ validating the data with what we defined in schema file 
+#defining functions for checking/ validating the data with what we defined in schema file
 from visa.exception import CustomException
 from visa.logger import logging
 import os, sys
-from visa.utils.utils import read_yaml_file
+from visa.utils.utils import read_yaml_file, is_columnar_file, load_columnar_data, read_data_columns, \
+    read_csv_with_schema
+from visa.constant import *
 import pandas as pd
 import collections
+from collections import namedtuple
+
+#result of all the checks of one file, computed from a single read of that file
+IngestedDataValidationResult = namedtuple("IngestedDataValidationResult",
+                                          ["file_path", "is_filename_validated", "is_column_numbers_validated",
+                                           "is_column_names_validated", "is_missing_values_whole_column",
+                                           "number_of_rows", "null_counts", "is_validated", "profile"])
 
 
 class IngestedDataValidation:
 
     def __init__(self, validate_path, schema_path):
         try:
-            #validate path will be our new data file and we have to compare it with our schema file 
+            #validate path will be our new data file and we have to compare it with our schema file
             self.validate_path = validate_path
             self.schema_path = schema_path
             #reading schema file
             self.data = read_yaml_file(self.schema_path)
+            #file is read only once and kept here for all the checks
+            self.columns = None
+            self.dataframe = None
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+#reading only the header, enough for column checks
+    def read_columns(self) -> list:
+        try:
+            if self.columns is None:
+                self.columns = read_data_columns(self.validate_path)
+            return self.columns
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+#reading the file to validate, it can be csv or columnar npz file
+#csv is read with schema dtypes so categorical columns do not take memory as object
+    def read_data(self) -> pd.DataFrame:
+        try:
+            if self.dataframe is None:
+                logging.info(f"Reading file to validate: [{self.validate_path}]")
+                if is_columnar_file(self.validate_path):
+                    self.dataframe = load_columnar_data(self.validate_path)
+                else:
+                    self.dataframe = read_csv_with_schema(file_path=self.validate_path,
+                                                          schema_file_path=self.schema_path,
+                                                          extra_columns=self.read_columns())
+                self.columns = list(self.dataframe.columns)
+            return self.dataframe
         except Exception as e:
             raise CustomException(e,sys) from e
 
 #validate the csv data file
 #here we will just pass the new file name wto validate it with our schema file name
+#only name without extension is compared because data can be stored as csv or npz
     def validate_filename(self, file_name)->bool:
         try:
-            #just printing the file name
-            print(self.data["FileName"])
             #defining file name
             schema_file_name = self.data['FileName']
-            if schema_file_name == file_name:
+            if os.path.splitext(schema_file_name)[0] == os.path.splitext(file_name)[0]:
                 return True
+            return False
         except Exception as e:
             raise CustomException(e,sys) from e
 
@@ -36,29 +74,29 @@ class IngestedDataValidation:
 #here we just passing the validate path as new file to compare with schmea columns
     def validate_column_length(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
-            if(df.shape[1] == self.data['NumberofColumns']):
-                return True
-            else:
-                return False
+            return len(self.read_columns()) == self.data['NumberofColumns']
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+#null count of every column in one vectorized call
+    def get_null_counts(self) -> pd.Series:
+        try:
+            return self.read_data().isna().sum()
         except Exception as e:
             raise CustomException(e,sys) from e
- 
-#true for zero data and false if there is no zero whole 
+
+#true for zero data and false if there is no zero whole
     def missing_values_whole_column(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
-            count = 0
-            for columns in df:
-                if (len(df[columns]) - df[columns].count()) == len(df[columns]):
-                    count+=1
-            return True if (count == 0) else False
+            number_of_rows = len(self.read_data())
+            return int((self.get_null_counts() == number_of_rows).sum()) == 0
         except Exception as e:
             raise CustomException(e,sys) from e
 
+#working on a copy, data kept for the other checks must not change
     def replace_null_values_with_null(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
+            df = self.read_data().copy()
             df.fillna('NULL',inplace=True)
         except Exception as e:
             raise CustomException(e,sys) from e
@@ -66,11 +104,76 @@ class IngestedDataValidation:
 #check columns name
     def check_column_names(self)->bool:
         try:
-            df = pd.read_csv(self.validate_path)
-            df_column_names = df.columns
+            df_column_names = self.read_columns()
             schema_column_names = list(self.data['ColumnNames'].keys())
 
             return True if (collections.Counter(df_column_names) == collections.Counter(schema_column_names)) else False
 
         except Exception as e:
-            raise CustomException(e,sys) from e
\ No newline at end of file
+            raise CustomException(e,sys) from e
+
+#statistics of every column computed with vectorized pandas calls on the already read data
+#numerical columns get min/max/mean/quantiles and categorical columns get frequency of every category
+#null_counts already computed by validate can be passed so they are not counted again
+    def get_data_profile(self, null_counts: pd.Series = None) -> dict:
+        try:
+            dataframe = self.read_data()
+            if null_counts is None:
+                null_counts = self.get_null_counts()
+            cardinality = dataframe.nunique()
+
+            numerical_dataframe = dataframe.select_dtypes(include="number")
+            quantiles = numerical_dataframe.quantile(DATA_PROFILE_QUANTILES)
+            minimums = numerical_dataframe.min()
+            maximums = numerical_dataframe.max()
+            means = numerical_dataframe.mean()
+
+            profile = {}
+            for column in dataframe.columns:
+                column_profile = {
+                    DATA_PROFILE_DTYPE_KEY: str(dataframe[column].dtype),
+                    DATA_PROFILE_NULL_COUNT_KEY: int(null_counts[column]),
+                    DATA_PROFILE_CARDINALITY_KEY: int(cardinality[column]),
+                }
+                if column in numerical_dataframe.columns:
+                    column_profile[DATA_PROFILE_MIN_KEY] = float(minimums[column])
+                    column_profile[DATA_PROFILE_MAX_KEY] = float(maximums[column])
+                    column_profile[DATA_PROFILE_MEAN_KEY] = float(means[column])
+                    column_profile[DATA_PROFILE_QUANTILES_KEY] = {float(quantile): float(value) for quantile, value
+                                                                  in quantiles[column].items()}
+                else:
+                    frequencies = dataframe[column].value_counts(dropna=True)
+                    column_profile[DATA_PROFILE_FREQUENCIES_KEY] = {(value.item() if hasattr(value, "item") else value): int(count)
+                                                                    for value, count in frequencies.items()}
+                profile[column] = column_profile
+            return profile
+        except Exception as e:
+            raise CustomException(e,sys) from e
+
+#running all the checks, header checks first and then the data is read only once for the rest
+    def validate(self) -> IngestedDataValidationResult:
+        try:
+            file_name = os.path.basename(self.validate_path)
+            is_filename_validated = self.validate_filename(file_name=file_name)
+            is_column_numbers_validated = self.validate_column_length()
+            is_column_names_validated = self.check_column_names()
+
+            dataframe = self.read_data()
+            null_counts = self.get_null_counts()
+            is_missing_values_whole_column = int((null_counts == len(dataframe)).sum()) == 0
+
+            validation_result = IngestedDataValidationResult(
+                file_path=self.validate_path,
+                is_filename_validated=is_filename_validated,
+                is_column_numbers_validated=is_column_numbers_validated,
+                is_column_names_validated=is_column_names_validated,
+                is_missing_values_whole_column=is_missing_values_whole_column,
+                number_of_rows=len(dataframe),
+                null_counts={column: int(count) for column, count in null_counts.items()},
+                is_validated=bool(is_filename_validated and is_column_numbers_validated and
+                                  is_column_names_validated and is_missing_values_whole_column),
+                profile=self.get_data_profile(null_counts=null_counts)
+            )
+            return validation_result
+        except Exception as e:
+            raise CustomException(e,sys) from e
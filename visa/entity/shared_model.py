@@ -0,0 +1,125 @@
+#model saving in shared array format: numpy arrays of the model are written in an array file next to the pickle
+#and memory mapped read only when the model is loaded, so all the server and batch workers share one copy.
+#sklearn trees copy their node arrays into private memory when they are unpickled, so trees of forests are
+#saved as MappedTree which keeps the node arrays as they are and gives same predictions as sklearn tree.
+#MappedTree is slower than sklearn tree and has only apply and predict, so this format is opted in for serving
+#with many workers where memory matters more than latency.
+import copy
+import sys
+import numpy as np
+from scipy import sparse
+from sklearn.tree._tree import Tree, TREE_LEAF
+from sklearn.ensemble._forest import BaseForest
+from visa.exception import CustomException
+from visa.utils.utils import SharedArrayPickler, save_shared_object
+
+#number of tree levels after which rows which reached a leaf stop going down
+LEAF_CHECK_INTERVAL = 4
+
+
+class MappedTree:
+    """
+    Read only copy of a fitted sklearn tree (tree_ of a forest estimator) which predicts from node arrays
+    children_left, children_right: np.ndarray child nodes, leaves are their own children
+    feature, threshold: np.ndarray split of the nodes
+    value: np.ndarray (node_count, n_outputs, max_n_classes) values of the nodes
+    max_depth: int number of splits from root to the deepest leaf
+    """
+
+    def __init__(self, children_left: np.ndarray, children_right: np.ndarray, feature: np.ndarray,
+                 threshold: np.ndarray, value: np.ndarray, max_depth: int):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.max_depth = max_depth
+        self.node_count = value.shape[0]
+        self.n_outputs = value.shape[1]
+        self.max_n_classes = value.shape[2]
+
+#leaves point to themselves so all the rows can take max_depth steps without checking for leaves
+    @classmethod
+    def from_tree(cls, tree: Tree):
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == TREE_LEAF
+        return cls(children_left=np.where(is_leaf, node_ids, tree.children_left),
+                   children_right=np.where(is_leaf, node_ids, tree.children_right),
+                   feature=np.where(is_leaf, 0, tree.feature),
+                   threshold=tree.threshold.copy(),
+                   value=tree.value,
+                   max_depth=int(tree.max_depth))
+
+    def __reduce__(self):
+        return (self.__class__, (self.children_left, self.children_right, self.feature, self.threshold, self.value,
+                                 self.max_depth))
+
+#row goes left when X[i, feature] <= threshold like sklearn, all the rows take one step together
+    def apply(self, X) -> np.ndarray:
+        if sparse.issparse(X):
+            X = X.toarray()
+        if X.shape[0] == 1:
+            #walking one row with scalars is faster than array operations on one element
+            node_id = 0
+            row = X[0]
+            for _ in range(self.max_depth):
+                if row[self.feature[node_id]] <= self.threshold[node_id]:
+                    next_node_id = self.children_left[node_id]
+                else:
+                    next_node_id = self.children_right[node_id]
+                if next_node_id == node_id:
+                    break
+                node_id = next_node_id
+            return np.array([node_id], dtype=np.intp)
+
+        leaf_ids = np.zeros(X.shape[0], dtype=np.intp)
+        row_ids = np.arange(X.shape[0])
+        node_ids = leaf_ids
+        for depth in range(1, self.max_depth + 1):
+            is_left = X[row_ids, self.feature[node_ids]] <= self.threshold[node_ids]
+            node_ids = np.where(is_left, self.children_left[node_ids], self.children_right[node_ids])
+            #rows already in a leaf are dropped now and then, deep trees have few long paths
+            if depth % LEAF_CHECK_INTERVAL == 0 and depth < self.max_depth:
+                is_leaf = self.children_left[node_ids] == node_ids
+                leaf_ids[row_ids[is_leaf]] = node_ids[is_leaf]
+                row_ids, node_ids = row_ids[~is_leaf], node_ids[~is_leaf]
+        leaf_ids[row_ids] = node_ids
+        return leaf_ids
+
+    def predict(self, X) -> np.ndarray:
+        out = self.value.take(self.apply(X), axis=0, mode="clip")
+        if self.n_outputs == 1:
+            out = out.reshape(X.shape[0], self.max_n_classes)
+        return out
+
+
+class SharedModelPickler(SharedArrayPickler):
+    """
+    SharedArrayPickler which saves trees of forests as MappedTree, the model in memory is not changed
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, BaseForest) and any(isinstance(estimator.tree_, Tree)
+                                               for estimator in getattr(obj, "estimators_", [])):
+            mapped_forest = copy.copy(obj)
+            mapped_forest.estimators_ = []
+            for estimator in obj.estimators_:
+                mapped_estimator = copy.copy(estimator)
+                mapped_estimator.tree_ = MappedTree.from_tree(estimator.tree_)
+                mapped_forest.estimators_.append(mapped_estimator)
+            return mapped_forest.__reduce_ex__(self.proto)
+        return NotImplemented
+
+
+def save_shared_model(file_path: str, obj, min_array_bytes: int = 0):
+    """
+    Saves obj (model) in shared array format, load_object memory maps its arrays
+    file_path: str pickle file, arrays are saved in same name file with SHARED_ARRAY_FILE_EXTENSION
+    obj: Any sort of object
+    min_array_bytes: int smaller arrays are kept in the pickle
+    """
+    try:
+        save_shared_object(file_path=file_path, obj=obj, min_array_bytes=min_array_bytes,
+                           pickler_class=SharedModelPickler)
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -0,0 +1,145 @@
+#scoring a big csv file with the latest pushed model.
+#file is read in chunks and every chunk is scored by a worker process which loads the model once when it starts,
+#scored chunks are appended to output file in input order so only a few chunks are in memory at a time
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import pandas as pd
+from visa.constant import *
+from visa.logger import logging
+from visa.exception import CustomException
+from visa.entity.config_entity import BatchPredictionConfig
+from visa.utils.utils import load_object, read_csv_with_schema, get_latest_model_path
+
+#model of this worker process, loaded once by init_prediction_worker
+prediction_model = None
+
+
+def init_prediction_worker(model_file_path: str):
+    global prediction_model
+    prediction_model = load_object(file_path=model_file_path)
+
+
+def get_prediction_features(dataframe: pd.DataFrame, current_year: int) -> pd.DataFrame:
+    """
+    Same derived columns as data ingestion, input file may not have the target column
+    """
+    dataframe[COLUMN_COMPANY_AGE] = current_year - dataframe[COLUMN_YEAR_ESTB]
+    return dataframe.drop(columns=[COLUMN_ID, COLUMN_YEAR_ESTB, COLUMN_CASE_STATUS], errors="ignore")
+
+
+def get_prediction_feature_records(records: list, current_year: int) -> list:
+    """
+    Same derived columns as get_prediction_features for records (list of dict) without a dataframe
+    """
+    feature_records = []
+    for record in records:
+        feature_record = {column: value for column, value in record.items()
+                          if column not in [COLUMN_ID, COLUMN_YEAR_ESTB, COLUMN_CASE_STATUS]}
+        feature_record[COLUMN_COMPANY_AGE] = current_year - record[COLUMN_YEAR_ESTB]
+        feature_records.append(feature_record)
+    return feature_records
+
+
+def score_dataframe(model, dataframe: pd.DataFrame, current_year: int) -> pd.DataFrame:
+    """
+    Returns case_id, prediction and probability of case status 1 (Denied) of every row of the dataframe
+    features are transformed once and used for both prediction and probability
+    model: VisaApprovalPredictor
+    """
+    try:
+        case_ids = dataframe[COLUMN_ID].to_numpy() if COLUMN_ID in dataframe.columns else None
+        transformed_feature = model.transform(get_prediction_features(dataframe=dataframe, current_year=current_year))
+        probabilities = model.predict_proba_transformed(transformed_feature)
+        positive_class_index = list(model.trained_model_object.classes_).index(1)
+        return pd.DataFrame({COLUMN_ID: case_ids,
+                             PREDICTION_COLUMN: model.predict_transformed(transformed_feature),
+                             PREDICTION_PROBABILITY_COLUMN: probabilities[:, positive_class_index]})
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def predict_chunk(chunk: pd.DataFrame, current_year: int) -> pd.DataFrame:
+    #runs in a worker process with the model loaded by init_prediction_worker
+    return score_dataframe(model=prediction_model, dataframe=chunk, current_year=current_year)
+
+
+class BatchPrediction:
+
+    def __init__(self, batch_prediction_config: BatchPredictionConfig):
+        try:
+            logging.info(f"{'>>' * 30}Batch prediction log started.{'<<' * 30} ")
+            self.batch_prediction_config = batch_prediction_config
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_num_workers(self) -> int:
+        try:
+            return max(1, self.batch_prediction_config.num_workers or os.cpu_count() or 1)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#appending scored chunk to output file, header is written with first chunk only
+    @staticmethod
+    def write_predictions(prediction_dataframe: pd.DataFrame, output_file_path: str, is_first_chunk: bool):
+        try:
+            prediction_dataframe.to_csv(output_file_path, index=False, mode="w" if is_first_chunk else "a",
+                                        header=is_first_chunk)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_batch_prediction(self, input_file_path: str, output_file_path: str,
+                                  model_file_path: str = None) -> str:
+        """
+        input_file_path: csv file with the raw columns (case_id, yr_of_estab and schema columns)
+        output_file_path: csv file with case_id, prediction and probability
+        model_file_path: latest pushed model is used if not given
+        """
+        try:
+            if model_file_path is None:
+                model_file_path = get_latest_model_path(model_export_dir=self.batch_prediction_config.model_export_dir,
+                                                        model_file_name=self.batch_prediction_config.model_file_name)
+            num_workers = self.get_num_workers()
+            current_year = date.today().year
+            logging.info(f"Scoring [{input_file_path}] with model [{model_file_path}] in chunks of "
+                         f"[{self.batch_prediction_config.chunk_size}] rows with [{num_workers}] processes")
+
+            os.makedirs(os.path.dirname(os.path.abspath(output_file_path)), exist_ok=True)
+            chunks = read_csv_with_schema(file_path=input_file_path,
+                                          schema_file_path=self.batch_prediction_config.schema_file_path,
+                                          extra_columns=[COLUMN_ID, COLUMN_YEAR_ESTB],
+                                          chunksize=self.batch_prediction_config.chunk_size)
+            number_of_rows = 0
+            if num_workers == 1:
+                init_prediction_worker(model_file_path=model_file_path)
+                for chunk in chunks:
+                    prediction_dataframe = predict_chunk(chunk=chunk, current_year=current_year)
+                    self.write_predictions(prediction_dataframe, output_file_path, is_first_chunk=number_of_rows == 0)
+                    number_of_rows += len(prediction_dataframe)
+            else:
+                with ProcessPoolExecutor(max_workers=num_workers, initializer=init_prediction_worker,
+                                         initargs=(model_file_path,)) as executor:
+                    #at most two chunks per worker are read ahead, results are written in submit order
+                    pending_results = deque()
+                    for chunk in chunks:
+                        pending_results.append(executor.submit(predict_chunk, chunk, current_year))
+                        if len(pending_results) >= 2 * num_workers:
+                            prediction_dataframe = pending_results.popleft().result()
+                            self.write_predictions(prediction_dataframe, output_file_path,
+                                                   is_first_chunk=number_of_rows == 0)
+                            number_of_rows += len(prediction_dataframe)
+                    while len(pending_results) > 0:
+                        prediction_dataframe = pending_results.popleft().result()
+                        self.write_predictions(prediction_dataframe, output_file_path,
+                                               is_first_chunk=number_of_rows == 0)
+                        number_of_rows += len(prediction_dataframe)
+
+            logging.info(f"Scored [{number_of_rows}] rows, predictions saved at: [{output_file_path}]")
+            return output_file_path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def __del__(self):
+        logging.info(f"{'>>' * 30}Batch prediction log completed.{'<<' * 30} ")
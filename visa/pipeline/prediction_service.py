@@ -0,0 +1,206 @@
+#prediction service used by the flask app. latest pushed model is loaded once when the service starts.
+#requests are put in a queue and one background thread takes all the queued records (up to max batch size),
+#so records of concurrent requests are scored with one transform and one predict call.
+#repeated records are answered from prediction cache, and when a new model is pushed it is loaded and cache is cleared
+import sys
+import time
+import threading
+import queue
+from concurrent.futures import Future
+from datetime import date
+from visa.constant import *
+from visa.logger import logging
+from visa.exception import CustomException
+from visa.entity.config_entity import PredictionServiceConfig
+from visa.utils.utils import load_object, get_latest_model_path
+from visa.entity.prediction_cache import PredictionCache
+from visa.pipeline.batch_prediction import get_prediction_feature_records
+
+
+class PredictionService:
+
+    def __init__(self, prediction_service_config: PredictionServiceConfig, model_file_path: str = None):
+        """
+        prediction_service_config: max batch size and max wait of the micro batches
+        model_file_path: latest pushed model is used and newly pushed models are loaded if not given
+        """
+        try:
+            self.prediction_service_config = prediction_service_config
+            self.prediction_cache = None
+            if prediction_service_config.cache_max_size > 0:
+                self.prediction_cache = PredictionCache(max_size=prediction_service_config.cache_max_size,
+                                                        ttl_seconds=prediction_service_config.cache_ttl_seconds)
+            self.is_latest_model_used = model_file_path is None
+            self.number_of_model_loads = 0
+            self.load_model(model_file_path=self.get_latest_model_path() if model_file_path is None else model_file_path)
+
+            #queue of (records, future) of the requests
+            self.request_queue = queue.Queue()
+            self.stats_lock = threading.Lock()
+            self.start_time = time.monotonic()
+            self.number_of_requests = 0
+            self.number_of_records = 0
+            self.number_of_batches = 0
+            self.busy_seconds = 0.0
+
+            self.batch_thread = threading.Thread(target=self.run_batches, name="prediction-batches", daemon=True)
+            self.batch_thread.start()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_latest_model_path(self) -> str:
+        return get_latest_model_path(model_export_dir=self.prediction_service_config.model_export_dir,
+                                     model_file_name=self.prediction_service_config.model_file_name)
+
+    def load_model(self, model_file_path: str):
+        try:
+            model = load_object(file_path=model_file_path)
+            #fingerprint is part of cache keys, computing it here keeps it out of the first request
+            model.get_model_fingerprint()
+            #columns and categories every record must have, checked before a request joins a batch
+            required_columns = [column for column in model.preprocessing_object.feature_names_in_
+                                if column != COLUMN_COMPANY_AGE] + [COLUMN_YEAR_ESTB]
+            known_categories = model.get_known_categories()
+            if self.prediction_cache is not None:
+                #cached predictions of the old model are not used again
+                if self.number_of_model_loads > 0:
+                    self.prediction_cache.clear()
+                model.set_prediction_cache(self.prediction_cache)
+            self.model = model
+            self.model_file_path = model_file_path
+            self.required_columns = required_columns
+            self.known_categories = known_categories
+            self.last_model_check_time = time.monotonic()
+            self.number_of_model_loads += 1
+            logging.info(f"Prediction service loaded model: [{model_file_path}]")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#checked by batch thread before a batch, so model is never changed while a batch is scored
+    def reload_model_if_pushed(self):
+        try:
+            if not self.is_latest_model_used or time.monotonic() - self.last_model_check_time < \
+                    self.prediction_service_config.model_check_interval_seconds:
+                return
+            self.last_model_check_time = time.monotonic()
+            latest_model_file_path = self.get_latest_model_path()
+            if latest_model_file_path != self.model_file_path:
+                logging.info(f"New model pushed: [{latest_model_file_path}]")
+                self.load_model(model_file_path=latest_model_file_path)
+        except Exception as e:
+            #old model keeps serving if new one can not be loaded
+            logging.info(f"Could not load newly pushed model: {e}")
+
+    def validate_records(self, records: list):
+        """
+        Returns error message of the first record which can not be scored, None if all the records are fine
+        records: list of dict with case_id (optional), yr_of_estab and schema columns
+        """
+        required_columns = self.required_columns
+        known_categories = self.known_categories
+        for index, record in enumerate(records):
+            #missing values are not imputed for every column, so None and nan are rejected too
+            missing_columns = [column for column in required_columns
+                               if record.get(column) is None or record[column] != record[column]]
+            if len(missing_columns) > 0:
+                return f"record {index} does not have values of columns: {missing_columns}"
+            for column, categories in known_categories.items():
+                if record[column] not in categories:
+                    return f"record {index} has unknown value [{record[column]}] of column [{column}]"
+        return None
+
+    def predict(self, records: list) -> list:
+        """
+        Scores records of one request, waits till the micro batch which has them is scored
+        records: list of dict with case_id (optional), yr_of_estab and schema columns
+        return: list of dict with case_id (if given), prediction and probability in order of records
+        invalid records are rejected here with ValueError, so they never fail requests batched with them
+        """
+        try:
+            error_message = self.validate_records(records)
+            if error_message is not None:
+                raise ValueError(error_message)
+            future = Future()
+            self.request_queue.put((records, future))
+            return future.result()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+#first request is waited for without timeout, then more requests are taken till batch is full or max wait is over
+    def get_next_batch(self) -> list:
+        batch = [self.request_queue.get()]
+        number_of_records = len(batch[0][0])
+        deadline = time.monotonic() + self.prediction_service_config.max_wait_ms / 1000
+        while number_of_records < self.prediction_service_config.max_batch_size:
+            remaining_seconds = deadline - time.monotonic()
+            try:
+                if remaining_seconds > 0:
+                    request = self.request_queue.get(timeout=remaining_seconds)
+                else:
+                    request = self.request_queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            number_of_records += len(request[0])
+        return batch
+
+    def score_batch(self, batch: list):
+        try:
+            records = [record for request_records, _ in batch for record in request_records]
+            predictions, probabilities = self.model.score_records(
+                get_prediction_feature_records(records=records, current_year=date.today().year))
+            positive_class_index = list(self.model.trained_model_object.classes_).index(1)
+            predictions = predictions.tolist()
+            probabilities = probabilities[:, positive_class_index].tolist()
+
+            start = 0
+            for request_records, future in batch:
+                results = []
+                for index, record in enumerate(request_records, start=start):
+                    result = {PREDICTION_COLUMN: predictions[index], PREDICTION_PROBABILITY_COLUMN: probabilities[index]}
+                    if COLUMN_ID in record:
+                        result = {COLUMN_ID: record[COLUMN_ID], **result}
+                    results.append(result)
+                start += len(request_records)
+                future.set_result(results)
+        except Exception as e:
+            if len(batch) == 1:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            #requests are scored one by one so only the request which fails gets the error
+            logging.info(f"Scoring batch of {len(batch)} requests failed, scoring them separately: {e}")
+            for request in batch:
+                if not request[1].done():
+                    self.score_batch([request])
+
+    def run_batches(self):
+        while True:
+            batch = self.get_next_batch()
+            self.reload_model_if_pushed()
+            batch_start_time = time.monotonic()
+            self.score_batch(batch)
+            with self.stats_lock:
+                self.number_of_requests += len(batch)
+                self.number_of_records += sum(len(records) for records, _ in batch)
+                self.number_of_batches += 1
+                self.busy_seconds += time.monotonic() - batch_start_time
+
+    def get_stats(self) -> dict:
+        with self.stats_lock:
+            uptime_seconds = time.monotonic() - self.start_time
+            return {
+                "model_file_path": self.model_file_path,
+                "uptime_seconds": round(uptime_seconds, 3),
+                "queue_depth": self.request_queue.qsize(),
+                "requests": self.number_of_requests,
+                "records": self.number_of_records,
+                "batches": self.number_of_batches,
+                "average_batch_size": round(self.number_of_records / self.number_of_batches, 3)
+                if self.number_of_batches > 0 else 0,
+                "records_per_second": round(self.number_of_records / uptime_seconds, 3) if uptime_seconds > 0 else 0,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "model_loads": self.number_of_model_loads,
+                "prediction_cache": None if self.prediction_cache is None else self.prediction_cache.get_stats(),
+            }
@@ -3,6 +3,8 @@ import numpy as np
 import os, sys
 import numpy as np
 import dill
+import hashlib
+import shutil
 import pandas as pd
 from visa.constant import *
 from visa.exception import CustomException
@@ -38,17 +40,22 @@ def read_yaml_file(file_path:str)->dict:
         raise CustomException(e,sys) from e
 
 ############### data transformation
-def save_numpy_array_data(file_path: str, array: np.array):
+def save_numpy_array_data(file_path: str, array: np.array, dtype: str = None):
     """
-    Save numpy array data to file
+    Save numpy array data to file, sparse matrix is saved as dense array
+    saved without pickle so file can be memory mapped while loading
     file_path: str location of file to save
     array: np.array data to save
+    dtype: str dtype of saved array, None keeps array dtype
     """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
+        if hasattr(array, "toarray"):
+            array = array.toarray()
+        array = np.ascontiguousarray(array, dtype=dtype)
         with open(file_path, 'wb') as file_obj:
-            np.save(file_obj, array)
+            np.save(file_obj, array, allow_pickle=False)
     except Exception as e:
         raise CustomException(e, sys) from e
     
@@ -66,47 +73,384 @@ def save_object(file_path: str, obj):
     except Exception as e:
         raise CustomException(e, sys) from e
     
+def get_schema_dtypes(schema_file_path: str, columns: list = None) -> dict:
+    """
+    Returns pandas dtype of every column defined under ColumnNames of schema file
+    schema_file_path: str
+    columns: list if given only these columns are returned
+    """
+    try:
+        schema = read_yaml_file(schema_file_path)[DATASET_SCHEMA_COLUMNS_KEY]
+        return {column: SCHEMA_DTYPE_MAPPING.get(str(dtype), dtype) for column, dtype in schema.items()
+                if columns is None or column in columns}
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def read_csv_with_schema(file_path: str, schema_file_path: str, extra_columns: list = None, **kwargs):
+    """
+    Reads csv file with dtype and usecols taken from schema file, so categorical columns are read as
+    category instead of object. Columns which are neither in schema nor in extra_columns are not read.
+    file_path: str
+    schema_file_path: str
+    extra_columns: list columns not in schema which we still need (like case_id)
+    kwargs: passed to pd.read_csv (chunksize etc.)
+    """
+    try:
+        extra_columns = [] if extra_columns is None else extra_columns
+        #only header is read to know which columns are present in the file
+        file_columns = list(pd.read_csv(file_path, nrows=0).columns)
+        schema_dtypes = get_schema_dtypes(schema_file_path, columns=file_columns)
+        use_columns = [column for column in file_columns if column in schema_dtypes or column in extra_columns]
+        dataframe = pd.read_csv(file_path, usecols=use_columns, dtype=schema_dtypes, **kwargs)
+        if isinstance(dataframe, pd.DataFrame):
+            return restore_numeric_categories(dataframe)
+        #chunksize/iterator was given, converting every chunk while it is read
+        return (restore_numeric_categories(chunk) for chunk in dataframe)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def restore_numeric_categories(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    read_csv always parse categories as string, so encoded columns like case_status (0/1)
+    would come back as '0'/'1'. Categories which are all numbers are converted back to numbers.
+    dataframe: pd.DataFrame
+    """
+    try:
+        for column in dataframe.select_dtypes(include="category").columns:
+            categories = pd.to_numeric(dataframe[column].cat.categories, errors="coerce")
+            if len(categories) > 0 and not pd.isna(categories).any():
+                dataframe[column] = dataframe[column].cat.rename_categories(categories)
+        return dataframe
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def save_columnar_data(file_path: str, dataframe: pd.DataFrame):
+    """
+    Save dataframe as npz file with one array per column, no pickle is used.
+    Categorical and string columns are stored as integer codes plus array of categories.
+    file_path: str
+    dataframe: pd.DataFrame
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        arrays = {COLUMNAR_COLUMNS_KEY: np.array([str(column) for column in dataframe.columns])}
+        for index, column in enumerate(dataframe.columns):
+            series = dataframe[column]
+            if series.dtype == object:
+                series = series.astype("category")
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                categories = series.cat.categories.to_numpy()
+                arrays[f"{index}.codes"] = series.cat.codes.to_numpy()
+                arrays[f"{index}.categories"] = categories.astype(str) if categories.dtype == object else categories
+            else:
+                arrays[f"{index}.values"] = series.to_numpy()
+        with open(file_path, "wb") as file_obj:
+            np.savez(file_obj, **arrays)
+        return file_path
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_columnar_data(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Load dataframe saved by save_columnar_data, only the given columns are read from the file
+    file_path: str
+    columns: list if None all columns are loaded
+    """
+    try:
+        dataframe = {}
+        with np.load(file_path, allow_pickle=False) as data:
+            for index, column in enumerate(data[COLUMNAR_COLUMNS_KEY].tolist()):
+                if columns is not None and column not in columns:
+                    continue
+                if f"{index}.codes" in data.files:
+                    dataframe[column] = pd.Categorical.from_codes(data[f"{index}.codes"],
+                                                                  categories=data[f"{index}.categories"])
+                else:
+                    dataframe[column] = data[f"{index}.values"]
+        return pd.DataFrame(dataframe)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def is_columnar_file(file_path: str) -> bool:
+    return file_path.endswith(COLUMNAR_FILE_EXTENSION)
+
+
+def read_data_columns(file_path: str) -> list:
+    """
+    Returns column names of csv or columnar file without reading the data
+    file_path: str
+    """
+    try:
+        if is_columnar_file(file_path):
+            with np.load(file_path, allow_pickle=False) as data:
+                return data[COLUMNAR_COLUMNS_KEY].tolist()
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
 def load_data(file_path: str, schema_file_path: str) -> pd.DataFrame:
     try:
         dataset_schema = read_yaml_file(schema_file_path)
 
         schema = dataset_schema[DATASET_SCHEMA_COLUMNS_KEY]
 
-        dataframe = pd.read_csv(file_path)
+        file_columns = read_data_columns(file_path)
 
         error_message = ""
 
-        for column in dataframe.columns:
-            if column in list(schema.keys()):
-                dataframe[column].astype(schema[column])
-            else:
+        for column in file_columns:
+            if column not in schema:
                 error_message = f"{error_message} \nColumn: [{column}] is not in the schema."
         if len(error_message) > 0:
             raise Exception(error_message)
+
+        #columnar file already keeps most of the dtypes, only columns like encoded target are converted
+        if is_columnar_file(file_path):
+            dataframe = load_columnar_data(file_path=file_path)
+            return dataframe.astype(get_schema_dtypes(schema_file_path, columns=list(dataframe.columns)))
+        dataframe = read_csv_with_schema(file_path=file_path, schema_file_path=schema_file_path)
         return dataframe
 
     except Exception as e:
         raise CustomException(e, sys) from e
 
 ############# 
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: str 'r' maps file in memory read only, all processes reading it share the page cache
     return: np.array data loaded
     """
     try:
-        with open(file_path, 'rb') as file_obj:
-            return np.load(file_obj, allow_pickle=True)
+        return np.load(file_path, mmap_mode=mmap_mode, allow_pickle=False)
     except Exception as e:
         raise CustomException(e, sys) from e
     
+def get_shared_array_file_path(file_path: str) -> str:
+    """
+    Returns file of the arrays saved apart from the pickle of file_path by save_shared_object
+    """
+    return os.path.splitext(file_path)[0] + SHARED_ARRAY_FILE_EXTENSION
+
+
+class SharedArrayPickler(dill.Pickler):
+    """
+    Pickler which writes numpy arrays of at least min_array_bytes in array file instead of the pickle,
+    pickle only keeps offset, dtype, shape and hash of the array
+    """
+
+    def __init__(self, file_obj, array_file_obj, min_array_bytes: int = 0, **kwargs):
+        super().__init__(file_obj, **kwargs)
+        self.array_file_obj = array_file_obj
+        self.min_array_bytes = min_array_bytes
+        #same array (or same content) is written once
+        self.array_ids = dict()
+        self.array_hashes = dict()
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < max(self.min_array_bytes, 1):
+            return None
+        if id(obj) in self.array_ids:
+            return self.array_ids[id(obj)][0]
+        array = np.ascontiguousarray(obj)
+        array_hash = get_array_hash(array)
+        if array_hash not in self.array_hashes:
+            #arrays start at aligned offsets so their views are aligned like normal arrays
+            offset = -self.array_file_obj.tell() % SHARED_ARRAY_ALIGNMENT
+            self.array_file_obj.write(b"\0" * offset)
+            self.array_hashes[array_hash] = self.array_file_obj.tell()
+            self.array_file_obj.write(memoryview(array.reshape(-1)).cast("B"))
+        pid = (self.array_hashes[array_hash], np.lib.format.dtype_to_descr(array.dtype), array.shape, array_hash)
+        #array is kept till dump is over so its id is not reused by another object
+        self.array_ids[id(obj)] = (pid, obj)
+        return pid
+
+
+class SharedArrayUnpickler(dill.Unpickler):
+    """
+    Unpickler of SharedArrayPickler pickles, arrays are read only views of the memory mapped array file
+    so all the processes loading the object share one copy of the arrays
+    """
+
+    def __init__(self, file_obj, array_buffer=None, **kwargs):
+        super().__init__(file_obj, **kwargs)
+        self.array_buffer = array_buffer
+        self.arrays = dict()
+
+    def persistent_load(self, pid):
+        offset, dtype_descr, shape, _ = pid
+        if self.array_buffer is None:
+            raise dill.UnpicklingError("Pickle has shared arrays but array file is not found")
+        if offset not in self.arrays:
+            self.arrays[offset] = np.ndarray(shape=shape, dtype=np.lib.format.descr_to_dtype(dtype_descr),
+                                             buffer=self.array_buffer, offset=offset)
+        return self.arrays[offset]
+
+
+def save_shared_object(file_path: str, obj, min_array_bytes: int = 0, pickler_class=SharedArrayPickler):
+    """
+    Saves obj like save_object but numpy arrays are written in a separate array file,
+    load_object memory maps that file read only
+    file_path: str
+    obj: Any sort of object
+    min_array_bytes: int smaller arrays are kept in the pickle
+    pickler_class: SharedArrayPickler or its subclass
+    """
+    try:
+        dir_path = os.path.dirname(file_path)
+        os.makedirs(dir_path, exist_ok=True)
+        array_file_path = get_shared_array_file_path(file_path)
+        with open(file_path, "wb") as file_obj, open(array_file_path, "wb") as array_file_obj:
+            pickler_class(file_obj, array_file_obj, min_array_bytes=min_array_bytes).dump(obj)
+            number_of_array_bytes = array_file_obj.tell()
+        #empty file can not be memory mapped
+        if number_of_array_bytes == 0:
+            os.remove(array_file_path)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
 def load_object(file_path:str):
     """
     file_path: str
+    arrays saved by save_shared_object are memory mapped read only from the array file next to file_path
     """
     try:
+        array_buffer = None
+        array_file_path = get_shared_array_file_path(file_path)
+        if array_file_path != file_path and os.path.exists(array_file_path):
+            array_buffer = np.memmap(array_file_path, dtype=np.uint8, mode="r")
         with open(file_path, "rb") as file_obj:
-            return dill.load(file_obj)
+            return SharedArrayUnpickler(file_obj, array_buffer=array_buffer).load()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def copy_object_file(src: str, dst: str):
+    """
+    Copies file saved by save_object or save_shared_object, array file is copied with it
+    """
+    try:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        #array file is copied first, pickle found by a loader always has its arrays
+        if os.path.exists(get_shared_array_file_path(src)):
+            shutil.copy(src=get_shared_array_file_path(src), dst=get_shared_array_file_path(dst))
+        shutil.copy(src=src, dst=dst)
+        return dst
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+############# cache
+def get_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Returns sha256 of the file content, file is read in chunks so big files are not loaded in memory
+    file_path: str
+    chunk_size: int number of bytes read at a time
+    """
+    try:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_latest_model_path(model_export_dir: str, model_file_name: str) -> str:
+    """
+    Returns model file of the latest pushed model, pusher saves every model in a time stamp folder
+    model_export_dir: str folder of the pushed models (saved_models)
+    model_file_name: str name of the model file (model.pkl)
+    """
+    try:
+        if os.path.isdir(model_export_dir):
+            for time_stamp in sorted(os.listdir(model_export_dir), reverse=True):
+                model_file_path = os.path.join(model_export_dir, time_stamp, model_file_name)
+                if os.path.exists(model_file_path):
+                    return model_file_path
+        raise Exception(f"No pushed model found in [{model_export_dir}]")
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_object_hash(obj) -> str:
+    """
+    Returns sha256 of the pickled object, equal fitted objects give same hash
+    obj: Any sort of object
+    """
+    try:
+        return hashlib.sha256(dill.dumps(obj)).hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_cache_key(*values) -> str:
+    """
+    Returns sha256 of all the values, used as a folder name of a cache entry
+    values: anything which can be converted into string
+    """
+    try:
+        key = "|".join(str(value) for value in values)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
     except Exception as e:
-        raise CustomException(e, sys) from e
\ No newline at end of file
+        raise CustomException(e, sys) from e
+
+
+def get_array_hash(*arrays) -> str:
+    """
+    Returns sha256 of the arrays, shape and dtype are part of the hash so same bytes in other shape differ
+    arrays: np.ndarray (memory mapped arrays are read without loading them at once)
+    """
+    try:
+        array_hash = hashlib.sha256()
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            array_hash.update(f"{array.shape}|{array.dtype.str}".encode("utf-8"))
+            array_hash.update(memoryview(array.reshape(-1)).cast("B"))
+        return array_hash.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def link_or_copy_file(src: str, dst: str):
+    """
+    Hardlink src file at dst, if hardlink is not possible (other disk) then file is copied
+    src: str existing file
+    dst: str new file path
+    """
+    try:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+        return dst
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def read_data_profile(report_file_path: str, dataset_key: str = VALIDATION_REPORT_TRAIN_KEY) -> dict:
+    """
+    Returns per column statistics of train or test data from validation report,
+    None if report is not available
+    report_file_path: str
+    dataset_key: str train or test
+    """
+    try:
+        if report_file_path is None or not os.path.exists(report_file_path):
+            return None
+        validation_report = read_yaml_file(report_file_path)
+        return validation_report[dataset_key][VALIDATION_REPORT_PROFILE_KEY]
+    except Exception as e:
+        raise CustomException(e, sys) from e